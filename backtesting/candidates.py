@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+
+from backtesting.config import BacktestConfig
+from backtesting.exits import entry_mask
+from backtesting.panel import PricePanel
+
+# Dates ranked per chunk; bounds the temporary (chunk x tickers) arrays
+_SORT_CHUNK = 256
+
+
+def candidate_index(
+    panel: PricePanel,
+    config: BacktestConfig,
+    depth: "int | None" = None,
+    mask: "np.ndarray | None" = None,
+) -> np.ndarray:
+    """
+    Phase 3 candidates of every date, precomputed.
+
+    Row t holds the panel columns of the `depth` best entries for day t:
+    cells in `mask` (default entry_mask, i.e. the static filters on T-1 plus
+    trading on T) ordered by T-1 os_score descending, ties in ticker order
+    like nlargest(keep="first"). Unused slots are -1.
+
+    depth defaults to max_positions, which is always enough: the daily loop
+    only skips held tickers, and held + open slots never exceeds max_positions.
+
+    Returns: int32 array (T, depth)
+    """
+    if depth is None:
+        depth = config.max_positions
+    if mask is None:
+        mask = entry_mask(panel, config)
+    n_dates, n_tickers = mask.shape
+    depth = max(0, min(depth, n_tickers))
+
+    index = np.full((n_dates, depth), -1, dtype=np.int32)
+    if depth == 0 or n_dates < 2:
+        return index
+
+    for start in range(1, n_dates, _SORT_CHUNK):
+        stop = min(start + _SORT_CHUNK, n_dates)
+        rows = mask[start:stop]
+        # T-1 scores; masked-out cells sort last
+        key = np.where(rows, -panel.os_score[start - 1:stop - 1], np.inf)
+        # Cells at or above each row's depth-th best score (more only on ties),
+        # then a stable sort of just those by (row, key): ties stay in ticker order
+        kth = np.partition(key, depth - 1, axis=1)[:, depth - 1:depth]
+        t, j = np.nonzero(rows & (key <= kth))
+        order = np.lexsort((key[t, j], t))
+        t, j = t[order], j[order]
+        rank = np.arange(len(t)) - np.searchsorted(t, t)
+        keep = rank < depth
+        index[start + t[keep], rank[keep]] = j[keep]
+    return index
+
+
+def candidate_cells(index: np.ndarray, n_tickers: int) -> np.ndarray:
+    """Boolean (T, J) mask of the cells listed in a candidate_index."""
+    cells = np.zeros((len(index), n_tickers), dtype=bool)
+    t, k = np.nonzero(index >= 0)
+    cells[t, index[t, k]] = True
+    return cells
+
+
+def candidate_tickers(
+    df: pd.DataFrame,
+    config: BacktestConfig,
+    depth: "int | None" = None,
+) -> dict:
+    """
+    candidate_index for a scored frame: {entry date T: [ticker, ...]} with the
+    `depth` best tickers that pass the static filters on T-1 and trade on T,
+    best first. Dates without candidates are absent.
+
+    Ties keep the frame's row order within a date, as nlargest does on prev_df.
+    """
+    if depth is None:
+        depth = config.max_positions
+    dates = np.sort(df["date"].unique())
+    next_date = pd.Series(dates[1:], index=dates[:-1])
+
+    eligible = df.loc[
+        (df["volume"] > config.V) &
+        (df["close"] >= config.min_price) &
+        (df["os_score"].notna()),
+        ["ticker", "date", "os_score"],
+    ]
+    entry_date = eligible["date"].map(next_date)
+    traded = pd.MultiIndex.from_arrays([df["ticker"], df["date"]])
+    trades_next = pd.MultiIndex.from_arrays([eligible["ticker"], entry_date]).isin(traded)
+    eligible = eligible.assign(entry_date=entry_date)[trades_next]
+
+    # Stable sort on -score keeps frame order among ties
+    eligible = eligible.iloc[np.argsort(-eligible["os_score"].to_numpy(), kind="stable")]
+    eligible = eligible.iloc[np.argsort(eligible["entry_date"].to_numpy(), kind="stable")]
+    top = eligible.groupby("entry_date", sort=False).head(depth)
+    return {d: list(grp) for d, grp in top.groupby("entry_date", sort=False)["ticker"]}
+
+
+def event_dates(dates: list, candidates: dict, config: BacktestConfig) -> set:
+    """
+    Dates on which the reference loop can do anything, given candidate_tickers.
+
+    A position bought on T is closed by T + max(K, 1) at the latest (max hold,
+    or forced_close when the ticker stops trading), and a buy on T reads T-1.
+    Every other date starts and ends with no positions and no entries, so its
+    snapshot is flat cash and its frame is never looked at.
+    """
+    hold = max(config.K, 1)
+    position = {d: i for i, d in enumerate(dates)}
+    active = set()
+    for d in candidates:
+        i = position[d]
+        active.update(dates[max(i - 1, 0):i + hold + 1])
+    return active
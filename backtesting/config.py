@@ -8,6 +8,10 @@ class BacktestConfig:
     N: int = 20                     # Rolling window for z-scores (trading days)
     w1: float = -1.0                # Weight for return z-score D(r)
     w2: float = 1.0                 # Weight for volume z-score D(v)
+    signal_kernel: str = "pandas"   # "pandas" (groupby rolling) or "cumsum" (vectorized, float-tolerance equal)
+    signal_workers: int = 1         # >1: score ticker blocks in parallel (threads for cumsum, processes for pandas; >= 1M rows per worker)
+    signal_cache: bool = False      # Reuse r / D_r / D_v from .signal_cache/ next to data_path (keyed by file, dates, N)
+    signal_cache_mb: int = 1024     # Size bound of that folder (least recently used entries are evicted)
 
     # Exit hyperparameters
     win_take_rate: float = 0.05     # Take-profit threshold (5%)
@@ -17,6 +21,7 @@ class BacktestConfig:
     # Universe filter
     V: int = 500_000                # Minimum volume filter (shares)
     min_price: float = 1.00         # Minimum entry price (filters penny stocks / bankrupt OTC names)
+    prune_universe: bool = False    # Drop tickers that never pass V / min_price before scoring (same results)
     max_position_adv_pct: float = 0.10  # Max position size as % of T-1 volume (liquidity cap)
 
     # Date filter (ISO strings "YYYY-MM-DD"; None means no limit)
@@ -27,8 +32,18 @@ class BacktestConfig:
     initial_capital: float = 500_000.0
     max_positions: int = 3
 
+    # Engine: "reference" (per-date DataFrame lookups), "dense" (date x ticker arrays)
+    # or "stream" (data_path is a date-sorted scored parquet, read one day at a time)
+    engine: str = "reference"
+    checkpoint: bool = False        # Save engine_state.pkl so the run can be resumed (reference engine)
+    profile_memory: bool = False    # Also trace per-stage peak allocations (tracemalloc; slower run)
+
     # Paths
     data_path: str = "data/v3/prices.parquet"
+    price_cache: bool = False       # Memory-map the loaded frame from .price_cache/ next to data_path (keyed by file, dates)
+    price_cache_mb: int = 4096      # Size bound of that folder (least recently used entries are evicted)
+    frame_cache: bool = False       # Keep loaded / scored frames in process memory for repeat runs (frame_cache.py)
+    frame_cache_mb: int = 2048      # Memory budget of those frames (least recently used are dropped)
     output_dir: str = ""            # Set by run.py at runtime
 
     # Runtime (set by run.py, not by user)
@@ -1,6 +1,7 @@
 from pathlib import Path
 import gc
 
+import numpy as np
 import pandas as pd
 
 from backtesting.config import BacktestConfig
@@ -12,14 +13,17 @@ REQUIRED_COLUMNS = {
 
 
 def load_price_data(config: BacktestConfig) -> pd.DataFrame:
-    """Load and validate price data (parquet or CSV). Returns DataFrame sorted by ticker+date."""
+    """
+    Load and validate price data (parquet file, partitioned parquet directory
+    or CSV). Returns DataFrame sorted by ticker+date.
+    """
     path = Path(config.data_path)
     if not path.exists():
         raise FileNotFoundError(
             f"{path} not found. Run: python data/v3/preprocess.py --source fake"
         )
 
-    if path.suffix == ".parquet":
+    if path.is_dir() or path.suffix == ".parquet":
         df = _read_parquet_chunked(path, config.start_date, config.end_date)
     else:
         df = pd.read_csv(path, parse_dates=["date"])
@@ -40,18 +44,93 @@ def load_price_data(config: BacktestConfig) -> pd.DataFrame:
     return df
 
 
+def prune_universe(df: pd.DataFrame, config: BacktestConfig, keep=()) -> pd.DataFrame:
+    """
+    Drop tickers that can never be entered, before scoring.
+
+    A ticker is bought on T only if its T-1 row has volume > V, close >=
+    min_price and an os_score, and a score needs N earlier rows of that
+    ticker (r of its first row is NaN). Tickers without such a row are dropped
+    whole: kept tickers keep every row, so their rolling windows and scores
+    are exactly those of the unpruned frame and the run's outputs are
+    unchanged. Tickers in `keep` (e.g. open positions of a resumed run) are
+    always kept. A date on which only dropped tickers trade keeps one of its
+    rows so the trading calendar does not change.
+
+    df must be sorted by ticker, date (as load_price_data returns it).
+    """
+    if df.empty:
+        return df
+    codes, uniques = pd.factorize(df["ticker"])
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    row = np.arange(len(df)) - np.repeat(starts, np.diff(np.r_[starts, len(df)]))
+    qualifies = (
+        (row >= config.N)
+        & (df["volume"].to_numpy() > config.V)
+        & (df["close"].to_numpy() >= config.min_price)
+    )
+    keep_code = np.zeros(len(uniques), dtype=bool)
+    keep_code[codes[qualifies]] = True
+    keep_code |= np.asarray(pd.Index(uniques).isin(list(keep)))
+    mask = keep_code[codes]
+
+    date_codes, dates = pd.factorize(df["date"])
+    lost = np.bincount(date_codes[mask], minlength=len(dates)) == 0
+    if lost.any():
+        _, first_rows = np.unique(date_codes, return_index=True)
+        mask[first_rows[lost]] = True
+
+    if mask.all():  # nothing to drop: keep the columns (memory-mapped ones too) uncopied
+        return with_range_index(df)
+    # Categories of dropped tickers stay; everything downstream uses observed values
+    return df[mask].reset_index(drop=True)
+
+
+def with_range_index(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    df with a fresh RangeIndex, sharing its column arrays.
+
+    reset_index(drop=True) copies every column on pandas 2.x (no copy-on-write);
+    a shallow copy keeps columns memory-mapped from the price cache shared.
+    Adding or replacing columns of the result leaves df unchanged.
+    """
+    out = df.copy(deep=False)
+    out.index = pd.RangeIndex(len(out))
+    return out
+
+
+# Rows of the row groups decoded together by one read_row_groups call
+_READ_CHUNK_ROWS = 262_144
+
+
 def _read_parquet_chunked(
     path: Path,
     start_date: "str | None",
     end_date: "str | None",
 ) -> pd.DataFrame:
     """
-    Read parquet one mini-batch at a time (iter_batches default), filtering at the
-    Arrow level and immediately converting to pandas with numeric dtype optimization.
+    Read parquet a bounded group of row groups at a time, filtering at the
+    Arrow level and immediately converting to pandas with numeric dtype
+    optimization.
+
+    path is a parquet file or a partitioned dataset directory; partitions
+    outside [start_date, end_date] are skipped (see parquet_files).
+
+    Only the REQUIRED_COLUMNS present in the file are decoded (dividends and
+    any extra columns are skipped), and row groups whose min/max date
+    statistics fall outside [start_date, end_date] are never read, so a
+    narrow window on a date-clustered file (e.g. one sorted or partitioned
+    by date) decodes only its own row groups. A ticker-sorted file has every
+    date in every row group and is still scanned in full.
+
+    Each read_row_groups call decodes its column chunks in parallel on
+    Arrow's thread pool. The row groups are read in groups of at most
+    _READ_CHUNK_ROWS rows (or one larger row group) instead of all at
+    once: memory has to stay bounded, since the Arrow table of a read
+    (strings decoded in full) is held next to the pandas chunks so far.
 
     Benefits over pd.read_parquet():
-    - Peak RAM ≈ one Arrow batch (~7 MB) + accumulated pandas chunks
-    - Freed Arrow buffers released before the next batch is read
+    - Peak RAM ≈ one read (_READ_CHUNK_ROWS rows or one row group) + accumulated pandas chunks
     - 2-year window peaks at ~663 MB RSS vs ~964 MB for a naive read
 
     Category columns (ticker, name, sector, industry) are cast AFTER concat
@@ -64,24 +143,28 @@ def _read_parquet_chunked(
     import pyarrow.parquet as pq
 
     arrow_filter = _build_arrow_filter(start_date, end_date, pa, pc)
-    pf = pq.ParquetFile(path)
     chunks: list[pd.DataFrame] = []
 
-    for batch in pf.iter_batches():
-        tbl = pa.Table.from_batches([batch])
-        if arrow_filter is not None:
-            tbl = tbl.filter(arrow_filter)
-        if tbl.num_rows > 0:
-            chunk = tbl.to_pandas()
-            # Apply numeric optimizations per chunk — safe since no category merging needed
-            for col in ("open", "high", "low", "close", "dividends", "close_ffill"):
-                if col in chunk.columns:
-                    chunk[col] = chunk[col].astype("float32")
-            if "volume" in chunk.columns:
-                chunk["volume"] = chunk["volume"].astype("int32")
-            chunks.append(chunk)
-        del batch, tbl
-        gc.collect()
+    for file in parquet_files(path, start_date, end_date):
+        pf = pq.ParquetFile(file)
+        # Missing required columns are reported by load_price_data()
+        columns = [c for c in pf.schema_arrow.names if c in REQUIRED_COLUMNS]
+        row_groups = _row_groups_in_range(pf.metadata, start_date, end_date)
+        if not row_groups:
+            continue
+        for group in _row_group_chunks(pf.metadata, row_groups, _READ_CHUNK_ROWS):
+            tbl = pf.read_row_groups(group, columns=columns, use_threads=True)
+            if arrow_filter is not None:
+                tbl = tbl.filter(arrow_filter)
+            if tbl.num_rows > 0:
+                chunk = tbl.to_pandas()
+                # Apply numeric optimizations per chunk — safe since no category merging needed
+                for col in ("open", "high", "low", "close", "close_ffill"):
+                    if col in chunk.columns:
+                        chunk[col] = chunk[col].astype("float32")
+                if "volume" in chunk.columns:
+                    chunk["volume"] = chunk["volume"].astype("int32")
+                chunks.append(chunk)
 
     if not chunks:
         return pd.DataFrame()
@@ -92,6 +175,87 @@ def _read_parquet_chunked(
     return df
 
 
+def _row_group_chunks(metadata, row_groups: list[int], max_rows: int) -> list[list[int]]:
+    """row_groups split into consecutive runs of at most max_rows rows (a larger row group is a run of its own)."""
+    chunks: list[list[int]] = []
+    rows = 0
+    for i in row_groups:
+        n = metadata.row_group(i).num_rows
+        if chunks and rows + n <= max_rows:
+            chunks[-1].append(i)
+            rows += n
+        else:
+            chunks.append([i])
+            rows = n
+    return chunks
+
+
+def parquet_files(path, start_date: "str | None" = None, end_date: "str | None" = None) -> list[Path]:
+    """
+    The parquet files to read for [start_date, end_date]: [path] for a file,
+    or the files of a hive-partitioned directory (year=YYYY/ or
+    year=YYYY/month=MM/, as written by data/v3/preprocess.py --partition)
+    whose partition overlaps the window. Files outside key=value folders are
+    always read; folders starting with "." or "_" are ignored.
+    """
+    path = Path(path)
+    if not path.is_dir():
+        return [path]
+    start = pd.Timestamp(start_date) if start_date else None
+    end = pd.Timestamp(end_date) if end_date else None
+
+    files = []
+    for file in sorted(path.rglob("*.parquet")):
+        parts = file.relative_to(path).parts
+        if any(p.startswith((".", "_")) for p in parts):
+            continue
+        span = _partition_span(dict(p.split("=", 1) for p in parts[:-1] if "=" in p))
+        if span is not None:
+            lo, hi = span
+            if (end is not None and lo > end) or (start is not None and hi < start):
+                continue
+        files.append(file)
+    return files
+
+
+def _partition_span(keys: dict) -> "tuple[pd.Timestamp, pd.Timestamp] | None":
+    """First and last instant of a year / year+month partition, or None if unknown."""
+    try:
+        if "month" in keys:
+            period = pd.Period(year=int(keys["year"]), month=int(keys["month"]), freq="M")
+        elif "year" in keys:
+            period = pd.Period(year=int(keys["year"]), freq="Y")
+        else:
+            return None
+    except (KeyError, ValueError):  # month without year, or not a number
+        return None
+    return period.start_time, period.end_time
+
+
+def _row_groups_in_range(metadata, start_date, end_date) -> list[int]:
+    """Row groups whose date statistics overlap [start_date, end_date]; groups without statistics are kept."""
+    n = metadata.num_row_groups
+    names = [metadata.schema.column(i).name for i in range(metadata.num_columns)]
+    if not (start_date or end_date) or "date" not in names:
+        return list(range(n))
+    col = names.index("date")
+    start = pd.Timestamp(start_date) if start_date else None
+    end = pd.Timestamp(end_date) if end_date else None
+
+    keep = []
+    for i in range(n):
+        stats = metadata.row_group(i).column(col).statistics
+        if stats is not None and stats.has_min_max:
+            try:
+                lo, hi = pd.Timestamp(stats.min), pd.Timestamp(stats.max)
+            except (TypeError, ValueError):  # undecodable statistics: read the group
+                lo = hi = None
+            if lo is not None and ((end is not None and lo > end) or (start is not None and hi < start)):
+                continue
+        keep.append(i)
+    return keep
+
+
 def _build_arrow_filter(start_date, end_date, pa, pc):
     """Build a PyArrow filter expression from optional ISO date strings."""
     exprs = []
@@ -109,3 +273,81 @@ def _build_arrow_filter(start_date, end_date, pa, pc):
     for e in exprs[1:]:
         result = result & e
     return result
+
+
+# Columns the engine reads from a scored day frame (see engine.run_backtest_stream)
+SCORED_COLUMNS = [
+    "ticker", "date", "open", "high", "low", "close", "volume",
+    "r", "D_r", "D_v", "os_score", "name", "industry",
+]
+
+
+def save_scored_by_date(df: pd.DataFrame, path, row_group_size: int = 65_536) -> Path:
+    """
+    Write a scored frame (output of compute_os_scores) sorted by date, then
+    ticker, keeping only the columns the engine needs. This is the input
+    format of iter_scored_days / the "stream" engine.
+    """
+    import pyarrow.parquet as pq
+
+    path = Path(path)
+    pq.write_table(scored_table(df), path, row_group_size=row_group_size)
+    return path
+
+
+def scored_table(df: pd.DataFrame):
+    """The SCORED_COLUMNS of a scored frame as a (date, ticker)-sorted Arrow table."""
+    import pyarrow as pa
+
+    out = df[[c for c in SCORED_COLUMNS if c in df.columns]].sort_values(["date", "ticker"])
+    # Plain strings: per-batch category dictionaries would differ on read
+    for col in ("ticker", "name", "industry"):
+        if col in out.columns and isinstance(out[col].dtype, pd.CategoricalDtype):
+            out[col] = out[col].astype(object)
+    return pa.Table.from_pandas(out, preserve_index=False)
+
+
+def iter_scored_days(
+    path,
+    start_date: "str | None" = None,
+    end_date: "str | None" = None,
+    batch_size: int = 65_536,
+):
+    """
+    Yield (date, day_df) from a date-sorted scored parquet file, one trading
+    day at a time with day_df indexed by ticker.
+
+    The file is read in record batches; only the current batch and the rows
+    of the date still being assembled are held in memory, so peak RAM is
+    bounded by one batch plus one day's universe regardless of history length.
+    """
+    import pyarrow.parquet as pq
+
+    start = pd.Timestamp(start_date) if start_date else None
+    end = pd.Timestamp(end_date) if end_date else None
+    pf = pq.ParquetFile(path)
+    pending = None
+
+    for batch in pf.iter_batches(batch_size=batch_size):
+        chunk = batch.to_pandas()
+        if start is not None:
+            chunk = chunk[chunk["date"] >= start]
+        if end is not None:
+            chunk = chunk[chunk["date"] <= end]
+        if chunk.empty:
+            continue
+        if pending is not None:
+            chunk = pd.concat([pending, chunk], ignore_index=True)
+
+        dates = chunk["date"].to_numpy()
+        if (dates[1:] < dates[:-1]).any():
+            raise ValueError(f"{Path(path).name} is not sorted by date; write it with save_scored_by_date()")
+        # The last date may continue in the next batch
+        last = dates[-1]
+        pending = chunk[dates == last]
+        for day, grp in chunk[dates < last].groupby("date", sort=False):
+            yield day, grp.set_index("ticker")
+
+    if pending is not None:
+        for day, grp in pending.groupby("date", sort=False):
+            yield day, grp.set_index("ticker")
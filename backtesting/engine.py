@@ -1,11 +1,21 @@
 import dataclasses
+import pickle
 
+import numpy as np
 import pandas as pd
 
+from backtesting.candidates import candidate_cells, candidate_index, candidate_tickers, event_dates
 from backtesting.config import BacktestConfig
+from backtesting.exits import EXIT_REASONS, ExitPlan, resolve_exits
+from backtesting.panel import PricePanel, build_panel
+from backtesting.profiling import NULL_CLOCK, PhaseClock
+from backtesting.records import SnapshotLog, TradeLog
 
+# Engines that can start from, and save, an EngineState (checkpoint / resume)
+CHECKPOINT_ENGINES = ("reference", "stream")
 
-@dataclasses.dataclass
+
+@dataclasses.dataclass(slots=True)
 class Position:
     ticker: str
     entry_date: pd.Timestamp
@@ -33,10 +43,16 @@ def check_exit(pos: Position, row: pd.Series, config: BacktestConfig) -> tuple[b
 
     Returns: (should_exit, fill_price, exit_reason)
     """
-    p = pos.entry_price
+    return _exit_rule(
+        pos.entry_price, pos.days_held,
+        row["open"], row["high"], row["low"], row["close"], config,
+    )
+
+
+def _exit_rule(p, days_held: int, o, h, l, c, config: BacktestConfig) -> tuple[bool, float, str]:
+    """check_exit on raw scalars, shared by the reference and dense engines."""
     tp_price = p * (1 + config.win_take_rate)
     sl_price = p * (1 - config.stop_loss_rate)
-    o, h, l, c = row["open"], row["high"], row["low"], row["close"]
 
     if o <= sl_price:
         return True, o, "gap_down_stop"
@@ -46,13 +62,45 @@ def check_exit(pos: Position, row: pd.Series, config: BacktestConfig) -> tuple[b
         return True, tp_price, "intraday_tp"
     if l <= sl_price:
         return True, sl_price, "intraday_sl"
-    if pos.days_held >= config.K:
+    if days_held >= config.K:
         return True, c, "max_hold"
 
     return False, 0.0, ""
 
 
-def run_backtest(df: pd.DataFrame, config: BacktestConfig, progress_callback=None) -> tuple[pd.DataFrame, pd.DataFrame]:
+@dataclasses.dataclass
+class EngineState:
+    """
+    Everything run_backtest carries from one day to the next, so a run can be
+    checkpointed and later resumed on newly appended dates.
+
+    Pickled rather than JSON-encoded: cash and prices keep their NumPy scalar
+    types, so a resumed run does exactly the same arithmetic as a full rerun.
+    """
+    cash: float
+    positions: list[Position] = dataclasses.field(default_factory=list)
+    trades: TradeLog = dataclasses.field(default_factory=TradeLog)
+    snapshots: SnapshotLog = dataclasses.field(default_factory=SnapshotLog)
+    last_date: "pd.Timestamp | None" = None     # Last simulated date
+
+    def save(self, path) -> None:
+        with open(path, "wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path) -> "EngineState":
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+
+def run_backtest(
+    df: pd.DataFrame,
+    config: BacktestConfig,
+    progress_callback=None,
+    state: "EngineState | None" = None,
+    clock: "PhaseClock | None" = None,
+    fast: bool = True,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
     """
     Day-by-day simulation with 4-phase ordering:
       PHASE 1: INCREMENT days_held for all existing positions
@@ -60,23 +108,103 @@ def run_backtest(df: pd.DataFrame, config: BacktestConfig, progress_callback=Non
       PHASE 3: SELECT NEW ENTRIES from T-1 scores, buy at T close
       PHASE 4: RECORD DAILY SNAPSHOT (cash + mark-to-market)
 
+    If `state` is given, the simulation resumes from it: only dates after
+    state.last_date are simulated (df must still contain state.last_date for
+    its T-1 scores) and state is updated in place. Positions still open at the
+    end are force-closed in the returned trades only, never in state.
+
+    The loop is event-driven: per-date frames are only built for dates where
+    something can happen (candidates.event_dates); every other date gets a
+    flat-cash snapshot. A resumed run builds every frame, since the state's
+    open positions are not known ahead of the loop.
+
+    fast=False turns both shortcuts off: every date's frame is built and
+    Phase 3 filters T-1 and takes nlargest(os_score) each day, as the loop
+    did before candidates.py. It is the oracle of backtesting.equivalence.
+
+    clock (profiling.PhaseClock), if given, is charged the time of each phase
+    summed over all days.
+
+    Returns: (trades_df, portfolio_df)
+    """
+    clock = clock or NULL_CLOCK
+    clock.start()
+    rows_by_date = df.groupby("date").indices      # sorted by date
+    dates = list(rows_by_date)
+    candidates = candidate_tickers(df, config) if fast else None
+    active = None if state is not None or not fast else event_dates(dates, candidates, config)
+    clock.lap("candidates")
+
+    # Per-date frames are built lazily, in date order
+    days = (
+        (d, df.iloc[rows_by_date[d]].set_index("ticker") if active is None or d in active else None)
+        for d in dates
+    )
+    return run_backtest_stream(
+        days, config, progress_callback=progress_callback, state=state,
+        n_dates=len(dates), candidates=candidates, clock=clock,
+    )
+
+
+def run_backtest_stream(
+    days,
+    config: BacktestConfig,
+    progress_callback=None,
+    state: "EngineState | None" = None,
+    n_dates: "int | None" = None,
+    candidates: "dict | None" = None,
+    clock: "PhaseClock | None" = None,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    run_backtest over an iterable of (date, day_df) in ascending date order,
+    where day_df is one date's scored cross-section indexed by ticker (e.g.
+    data_loader.iter_scored_days). Only today, T-1 and the open positions are
+    kept, so peak memory is bounded by one day's universe.
+
+    n_dates is only forwarded to progress_callback (None if unknown).
+    candidates ({date: ranked tickers}, see candidates.candidate_tickers)
+    replaces the daily Phase 3 filter + nlargest over T-1; without it each
+    day's candidates are selected from prev_df.
+
+    day_df may be None for an idle date: no open positions, and no candidates
+    on that date or the next (see run_backtest). It gets a flat-cash snapshot.
+    Time spent producing each day is charged to the "read_day" phase of clock.
+    State handling is the same as run_backtest; days up to state.last_date
+    are skipped.
+
     Returns: (trades_df, portfolio_df)
     """
-    dates = sorted(df["date"].unique())
-    n_dates = len(dates)
-    # Pre-build lookup dict for O(1) per-stock access per date
-    date_to_df = {d: grp.set_index("ticker") for d, grp in df.groupby("date")}
+    if state is None:
+        state = EngineState(cash=config.initial_capital)
+    resume_after = state.last_date
 
-    cash = config.initial_capital
-    positions: list[Position] = []
-    trades: list[dict] = []
-    snapshots: list[dict] = []
+    cash = state.cash
+    positions: list[Position] = state.positions
+    trades: TradeLog = state.trades
+    snapshots: SnapshotLog = state.snapshots
+    prev_date = prev_df = None
+    clock = clock or NULL_CLOCK
+    clock.start()
+
+    for i, (today, today_df) in enumerate(days):
+        clock.lap("read_day")
+        if prev_date is not None and today <= prev_date:
+            raise ValueError(f"Days must be in ascending date order ({today} after {prev_date})")
+        if resume_after is not None and today <= resume_after:
+            prev_date, prev_df = today, today_df
+            continue
+        if resume_after is not None and prev_date != resume_after:
+            raise _missing_resume_date(resume_after)
+        resume_after = None
 
-    for i, today in enumerate(dates):
         if progress_callback is not None:
             progress_callback(i, n_dates, today, len(positions), len(trades))
-        today_df = date_to_df[today]
-        prev_df = date_to_df.get(dates[i - 1]) if i > 0 else None
+
+        if today_df is None:
+            snapshots.append(today, cash, 0)
+            prev_date, prev_df = today, None
+            clock.lap("idle")
+            continue
 
         # PHASE 1: INCREMENT days_held
         for pos in positions:
@@ -88,31 +216,35 @@ def run_backtest(df: pd.DataFrame, config: BacktestConfig, progress_callback=Non
             if pos.ticker not in today_df.index:
                 # Delisted: force close at entry price (conservative)
                 cash += pos.shares * pos.entry_price
-                trades.append(_build_trade(pos, today, pos.entry_price, "forced_close"))
+                trades.append(pos, today, pos.entry_price, "forced_close")
                 continue
             should_exit, fill_price, reason = check_exit(
                 pos, today_df.loc[pos.ticker], config
             )
             if should_exit:
                 cash += pos.shares * fill_price
-                trades.append(_build_trade(pos, today, fill_price, reason))
+                trades.append(pos, today, fill_price, reason)
             else:
                 remaining.append(pos)
         positions = remaining
+        clock.lap("exits")
 
         # PHASE 3: NEW ENTRIES (using T-1 scores)
         open_slots = config.max_positions - len(positions)
         if open_slots > 0 and prev_df is not None:
             held_tickers = {p.ticker for p in positions}
-            candidates = prev_df[
-                (prev_df["volume"] > config.V) &
-                (prev_df["close"] >= config.min_price) &
-                (prev_df["os_score"].notna()) &
-                (~prev_df.index.isin(held_tickers)) &
-                (prev_df.index.isin(today_df.index))
-            ].nlargest(open_slots, "os_score")
-
-            for ticker in candidates.index:
+            if candidates is not None:
+                picks = [t for t in candidates.get(today, ()) if t not in held_tickers][:open_slots]
+            else:
+                picks = prev_df[
+                    (prev_df["volume"] > config.V) &
+                    (prev_df["close"] >= config.min_price) &
+                    (prev_df["os_score"].notna()) &
+                    (~prev_df.index.isin(held_tickers)) &
+                    (prev_df.index.isin(today_df.index))
+                ].nlargest(open_slots, "os_score").index
+
+            for ticker in picks:
                 allocation = cash / open_slots
                 buy_price = today_df.loc[ticker, "close"]
                 shares = int(allocation // buy_price)
@@ -140,53 +272,251 @@ def run_backtest(df: pd.DataFrame, config: BacktestConfig, progress_callback=Non
                         industry=str(prev_row.get("industry", "")),
                     ))
 
+        clock.lap("entries")
+
         # PHASE 4: DAILY SNAPSHOT
         pos_value = sum(
             pos.shares * today_df.loc[pos.ticker, "close"]
             for pos in positions
             if pos.ticker in today_df.index
         )
-        snapshots.append({
-            "date": pd.Timestamp(today).strftime("%Y-%m-%d"),
-            "cash": round(cash, 2),
-            "position_value": round(pos_value, 2),
-            "total_value": round(cash + pos_value, 2),
-        })
+        snapshots.append(today, cash, pos_value)
+        prev_date, prev_df = today, today_df
+        clock.lap("snapshot")
 
-    # Force-close any remaining open positions at last close
-    last_date = dates[-1]
-    last_df = date_to_df[last_date]
+    if prev_date is None:
+        raise ValueError("No trading days to simulate")
+    if resume_after is not None and prev_date != resume_after:
+        raise _missing_resume_date(resume_after)
+    state.cash = cash
+    state.positions = positions
+    state.last_date = prev_date
+
+    # Force-close any remaining open positions at last close (output only)
+    last_date, last_df = prev_date, prev_df
+    final_trades = trades.copy()
     for pos in positions:
         if pos.ticker in last_df.index:
-            fill_price = last_df.loc[pos.ticker, "close"]
-            trades.append(_build_trade(pos, last_date, fill_price, "forced_close"))
-
-    port_df = pd.DataFrame(snapshots)
-    if not port_df.empty:
-        port_df["daily_return"] = port_df["total_value"].pct_change().fillna(0)
-        port_df["cumulative_return"] = (1 + port_df["daily_return"]).cumprod() - 1
-
-    return pd.DataFrame(trades), port_df
-
-
-def _build_trade(pos: Position, exit_date, exit_price: float, reason: str) -> dict:
-    pnl = (exit_price - pos.entry_price) * pos.shares
-    return {
-        "ticker": pos.ticker,
-        "company_name": pos.company_name,
-        "industry": pos.industry,
-        "entry_date": pd.Timestamp(pos.entry_date).strftime("%Y-%m-%d"),
-        "entry_price": round(pos.entry_price, 4),
-        "exit_date": pd.Timestamp(exit_date).strftime("%Y-%m-%d"),
-        "exit_price": round(exit_price, 4),
-        "shares": pos.shares,
-        "pnl": round(pnl, 2),
-        "pnl_pct": round(exit_price / pos.entry_price - 1, 6),
-        "exit_reason": reason,
-        "days_held": pos.days_held,
-        "r_prev": round(pos.r_prev, 6),
-        "v_prev": pos.v_prev,
-        "dr_prev": round(pos.dr_prev, 6),
-        "dv_prev": round(pos.dv_prev, 6),
-        "os_prev": round(pos.os_prev, 6),
-    }
+            final_trades.append(pos, last_date, last_df.loc[pos.ticker, "close"], "forced_close")
+
+    result = final_trades.to_frame(), snapshots.to_frame()
+    clock.lap("build_frames")
+    return result
+
+
+def _missing_resume_date(last_date) -> ValueError:
+    return ValueError(
+        f"Cannot resume: data does not contain the last simulated date "
+        f"{pd.Timestamp(last_date).date()}"
+    )
+
+
+def run_engine(
+    df: pd.DataFrame,
+    config: BacktestConfig,
+    progress_callback=None,
+    state: "EngineState | None" = None,
+    clock: "PhaseClock | None" = None,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Run the simulation engine selected by config.engine on a scored frame.
+
+    `state` (checkpoint/resume, see run_backtest) is only supported by the
+    reference engine.
+    """
+    if config.engine == "reference":
+        return run_backtest(df, config, progress_callback=progress_callback, state=state, clock=clock)
+    if state is not None:
+        raise ValueError(
+            f"Engine {config.engine!r} does not support checkpoints; use one of {CHECKPOINT_ENGINES}"
+        )
+    if config.engine == "dense":
+        clock = clock or NULL_CLOCK
+        clock.start()
+        panel = build_panel(df)
+        clock.lap("build_panel")
+        return run_backtest_dense(panel, config, progress_callback=progress_callback, clock=clock)
+    raise ValueError(
+        f"Unknown engine {config.engine!r} for a scored frame (expected 'reference' or 'dense'; "
+        f"'stream' reads a scored file, see execute_run)"
+    )
+
+
+def run_backtest_dense(
+    panel: PricePanel,
+    config: BacktestConfig,
+    progress_callback=None,
+    exits: "ExitPlan | None" = None,
+    candidates: "np.ndarray | None" = None,
+    clock: "PhaseClock | None" = None,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    run_backtest on a PricePanel: the same 4-phase loop, but every lookup is an
+    integer (date, ticker) index into dense arrays instead of a DataFrame .loc.
+
+    Phase 3 reads each day's ranked entries from a candidate_index (computed
+    here unless passed in), and exits are portfolio-independent, so they are
+    resolved up front by resolve_exits() for those candidate cells only; the
+    loop only does slot allocation and cash accounting. Pass `exits` to reuse
+    a plan across runs that share TP/SL/K; it must cover every cell this
+    config can enter.
+    clock: see run_backtest.
+
+    Produces trades/portfolio frames identical to run_backtest on the frame the
+    panel was built from.
+
+    Returns: (trades_df, portfolio_df)
+    """
+    return run_backtest_variants(
+        panel, config, [(config.initial_capital, config.max_positions)],
+        progress_callback=progress_callback, exits=exits, candidates=candidates, clock=clock,
+    )[0]
+
+
+@dataclasses.dataclass(slots=True)
+class _Book:
+    """One portfolio advanced by run_backtest_variants."""
+    cash: float
+    max_positions: int
+    positions: list = dataclasses.field(default_factory=list)   # (Position, panel column, entry date index)
+    trades: TradeLog = dataclasses.field(default_factory=TradeLog)
+    snapshots: SnapshotLog = dataclasses.field(default_factory=SnapshotLog)
+
+
+def run_backtest_variants(
+    panel: PricePanel,
+    config: BacktestConfig,
+    variants: list[tuple[float, int]],
+    progress_callback=None,
+    exits: "ExitPlan | None" = None,
+    candidates: "np.ndarray | None" = None,
+    clock: "PhaseClock | None" = None,
+) -> list[tuple[pd.DataFrame, pd.DataFrame]]:
+    """
+    run_backtest_dense for several (initial_capital, max_positions) variants
+    of config in one pass: every portfolio advances over the same day loop,
+    candidate index and exit plan. Useful for capacity curves, where
+    max_position_adv_pct makes results depend on capital.
+
+    One candidate_index as deep as the largest max_positions serves every
+    variant (a shallower index is its prefix). Each variant's frames are
+    identical to a separate run_backtest_dense with that capital / count.
+
+    Returns: [(trades_df, portfolio_df), ...] in variant order
+    """
+    dates = panel.dates
+    n_dates = panel.n_dates
+    tickers = panel.tickers
+    present = panel.present
+    c_arr, vol_arr = panel.close, panel.volume
+    books = [_Book(cash=capital, max_positions=m) for capital, m in variants]
+
+    clock = clock or NULL_CLOCK
+    clock.start()
+    # Static part of Phase 3 (filters + ranking), evaluated once for every date
+    if candidates is None:
+        candidates = candidate_index(panel, config, depth=max((b.max_positions for b in books), default=0))
+        clock.lap("candidates")
+    if exits is None:
+        exits = resolve_exits(panel, config, mask=candidate_cells(candidates, panel.n_tickers))
+        clock.lap("resolve_exits")
+    exit_t_arr, fill_arr, reason_arr = exits.exit_t, exits.fill, exits.reason
+
+    # Dates with at least one candidate (+ sentinel): with no positions open,
+    # the loop jumps straight to the next one
+    event_days = np.append(np.flatnonzero((candidates >= 0).any(axis=1)), n_dates)
+    idle_until = 0
+
+    for i in range(n_dates):
+        if i < idle_until:
+            continue
+        if not any(book.positions for book in books):
+            idle_until = int(event_days[np.searchsorted(event_days, i)])
+            if idle_until > i:
+                for book in books:
+                    book.snapshots.extend_flat(dates[i:idle_until], book.cash)
+                clock.lap("idle")
+                continue
+        today = dates[i]
+        if progress_callback is not None:
+            progress_callback(
+                i, n_dates, today,
+                sum(len(b.positions) for b in books), sum(len(b.trades) for b in books),
+            )
+        present_today = present[i]
+
+        # PHASES 1-2: EXITS (resolved ahead of time by resolve_exits)
+        for book in books:
+            remaining = []
+            for entry in book.positions:
+                pos, j, t = entry
+                if exit_t_arr[t, j] == i:
+                    fill_price = fill_arr[t, j]
+                    pos.days_held = i - t
+                    book.cash += pos.shares * fill_price
+                    book.trades.append(pos, today, fill_price, EXIT_REASONS[reason_arr[t, j]])
+                else:
+                    remaining.append(entry)
+            book.positions = remaining
+        clock.lap("exits")
+
+        # PHASE 3: NEW ENTRIES (using T-1 scores)
+        if i > 0:
+            p = i - 1
+            ranked = [j for j in candidates[i].tolist() if j >= 0]
+            for book in books:
+                open_slots = book.max_positions - len(book.positions)
+                if open_slots <= 0:
+                    continue
+                held = {j for _, j, _ in book.positions}
+                picks = [j for j in ranked if j not in held][:open_slots]
+
+                for j in picks:
+                    allocation = book.cash / open_slots
+                    buy_price = c_arr[i, j]
+                    shares = int(allocation // buy_price)
+                    # Cap at max_position_adv_pct of T-1 volume (liquidity guard)
+                    adv_cap = int(vol_arr[p, j] * config.max_position_adv_pct)
+                    shares = min(shares, adv_cap)
+                    if shares > 0:
+                        cost = shares * buy_price
+                        book.cash -= cost
+                        open_slots -= 1
+                        book.positions.append((Position(
+                            ticker=tickers[j],
+                            entry_date=today,
+                            entry_price=buy_price,
+                            shares=shares,
+                            cost_basis=cost,
+                            days_held=0,
+                            r_prev=float(panel.entry_value(p, j, "r") or 0.0),
+                            v_prev=float(panel.entry_value(p, j, "volume") or 0.0),
+                            dr_prev=float(panel.entry_value(p, j, "D_r") or 0.0),
+                            dv_prev=float(panel.entry_value(p, j, "D_v") or 0.0),
+                            os_prev=float(panel.entry_value(p, j, "os_score") or 0.0),
+                            company_name=str(panel.entry_value(p, j, "name", "")),
+                            industry=str(panel.entry_value(p, j, "industry", "")),
+                        ), j, i))
+        clock.lap("entries")
+
+        # PHASE 4: DAILY SNAPSHOT
+        for book in books:
+            pos_value = sum(
+                pos.shares * c_arr[i, j]
+                for pos, j, _ in book.positions
+                if present_today[j]
+            )
+            book.snapshots.append(today, book.cash, pos_value)
+        clock.lap("snapshot")
+
+    # Force-close any remaining open positions at last close
+    last = n_dates - 1
+    results = []
+    for book in books:
+        for pos, j, t in book.positions:
+            pos.days_held = last - t
+            if present[last, j]:
+                book.trades.append(pos, dates[last], c_arr[last, j], "forced_close")
+        results.append((book.trades.to_frame(), book.snapshots.to_frame()))
+    clock.lap("build_frames")
+    return results
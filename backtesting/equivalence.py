@@ -0,0 +1,367 @@
+"""
+Equivalence / regression harness: optimized paths against the reference.
+
+Usage:
+    python -m backtesting.equivalence                          # 3 synthetic universes, all candidates
+    python -m backtesting.equivalence --seeds 10 --tickers 500 --days 750
+    python -m backtesting.equivalence --data_path data/v1/prices.csv --engines dense
+
+Every case is run through the reference implementations — compute_os_scores
+and run_backtest(fast=False), the plain per-day filter + nlargest loop over
+every date — and through each candidate (ENGINE_CANDIDATES on the reference
+scores, among them "event", the default event-driven run_backtest;
+SIGNAL_CANDIDATES against compute_os_scores). Outputs are diffed row
+by row with tolerances and the speedup over the reference is reported.
+
+Synthetic universes are randomized to reach every code path: late listings,
+delistings and missing days (forced_close at entry price), gaps through
+TP/SL levels, volume droughts (std=0 -> NaN scores), sub-min_price names
+and per-ticker volume scales from 1e3 to 1e8 (mixed liquidity). Each is written as CSV (float64 prices) and parquet (float32) and
+read back through load_price_data, and each case draws its own exit/sizing
+parameters. --data_path adds a prepared file, e.g. the fake Sharadar data
+from `python data/v1/preprocess.py --source fake`.
+
+Exits with status 1 if any candidate differs.
+"""
+
+import argparse
+import dataclasses
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from backtesting.config import BacktestConfig
+from backtesting.data_loader import iter_scored_days, load_price_data, save_scored_by_date
+from backtesting.engine import run_backtest, run_backtest_dense, run_backtest_stream
+from backtesting.panel import build_panel
+from backtesting.signals import _sharded_columns, combine_scores, compute_os_scores, sort_by_ticker_date
+
+# Scored columns compared between signal implementations
+SIGNAL_COLUMNS = ("r", "D_r", "D_v", "os_score")
+
+
+def _event(df: pd.DataFrame, config: BacktestConfig):
+    return run_backtest(df, config)
+
+
+def _dense(df: pd.DataFrame, config: BacktestConfig):
+    return run_backtest_dense(build_panel(df), config)
+
+
+def _stream(df: pd.DataFrame, config: BacktestConfig):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = save_scored_by_date(df, Path(tmp) / "scored.parquet")
+        return run_backtest_stream(iter_scored_days(path), config)
+
+
+# name -> fn(scored_df, config) -> (trades_df, portfolio_df)
+ENGINE_CANDIDATES = {
+    "event": _event,
+    "dense": _dense,
+    "stream": _stream,
+}
+
+
+def _cumsum_signals(df: pd.DataFrame, config: BacktestConfig) -> pd.DataFrame:
+    return compute_os_scores(df, dataclasses.replace(config, signal_kernel="cumsum"))
+
+
+def _sharded_signals(df: pd.DataFrame, config: BacktestConfig) -> pd.DataFrame:
+    # Synthetic universes are below SHARD_MIN_ROWS, where compute_os_scores stays serial
+    df = sort_by_ticker_date(df)
+    df["r"], df["D_r"], df["D_v"] = _sharded_columns(df, config, workers=3)
+    df["os_score"] = combine_scores(df, config)
+    return df
+
+
+# name -> fn(price_df, config) -> scored frame (same rows and order as compute_os_scores)
+SIGNAL_CANDIDATES = {
+    "cumsum": _cumsum_signals,
+    "sharded": _sharded_signals,
+}
+
+
+@dataclasses.dataclass
+class CaseResult:
+    case: str
+    kind: str                   # "engine" or "signals"
+    candidate: str
+    match: bool
+    rows: int
+    max_abs_diff: float
+    reference_seconds: float
+    candidate_seconds: float
+    first_diff: str = ""
+
+    @property
+    def speedup(self) -> float:
+        return self.reference_seconds / self.candidate_seconds if self.candidate_seconds > 0 else float("inf")
+
+
+def make_synthetic_universe(n_tickers: int = 200, n_days: int = 500, seed: int = 0) -> pd.DataFrame:
+    """Random price frame in the prices.csv schema (see module docstring)."""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2020-01-01", periods=n_days)
+    frames = []
+    for k in range(n_tickers):
+        ticker = f"T{k:04d}"
+        start = int(rng.integers(0, n_days // 3)) if rng.random() < 0.3 else 0
+        delisted = rng.random() < 0.2
+        stop = int(rng.integers(n_days // 2, n_days)) if delisted else n_days
+        n = stop - start
+        if n < 2:
+            continue
+        ret = rng.normal(0, rng.uniform(0.01, 0.05), n)
+        close = np.maximum(rng.uniform(0.5, 80) * np.exp(np.cumsum(ret)), 0.05)
+        open_ = close * np.exp(rng.normal(0, 0.02, n))
+        high = np.maximum(open_, close) * np.exp(np.abs(rng.normal(0, 0.015, n)))
+        low = np.minimum(open_, close) * np.exp(-np.abs(rng.normal(0, 0.015, n)))
+        # Per-ticker liquidity over five orders of magnitude, as in a real universe;
+        # capped at the loader's int32 volume
+        scale = 10 ** rng.uniform(3, 8)
+        volume = np.minimum(scale * rng.lognormal(0, 0.75, n), 2**31 - 1).astype(np.int64)
+        if rng.random() < 0.1:
+            s = int(rng.integers(0, max(1, n - 30)))
+            volume[s:s + 25] = 0
+        frame = pd.DataFrame({
+            "ticker": ticker,
+            "date": dates[start:stop],
+            "open": open_.round(2),
+            "high": high.round(2),
+            "low": low.round(2),
+            "close": close.round(2),
+            "volume": volume,
+            "dividends": 0.0,
+            "name": f"Company {ticker}",
+            "sector": "Sector",
+            "industry": f"Industry {k % 7}",
+            "is_delisted": delisted,
+            "close_ffill": close.round(2),
+            "is_halt": False,
+        })
+        # Some tickers skip random days: positions on them hit forced_close
+        if rng.random() < 0.2:
+            frame = frame[rng.random(n) > 0.02]
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+
+def random_config(rng: np.random.Generator, data_path: str) -> BacktestConfig:
+    """Exit, sizing and filter parameters drawn for one case."""
+    return BacktestConfig(
+        data_path=data_path,
+        N=int(rng.choice([5, 10, 20])),
+        win_take_rate=float(rng.choice([0.02, 0.04, 0.05, 0.08])),
+        stop_loss_rate=float(rng.choice([0.01, 0.03, 0.05])),
+        K=int(rng.integers(1, 8)),
+        max_positions=int(rng.integers(1, 11)),
+        V=int(rng.choice([100_000, 500_000, 2_000_000])),
+        min_price=float(rng.choice([1.0, 5.0])),
+        initial_capital=float(rng.choice([100_000.0, 500_000.0, 10_000_000.0])),
+    )
+
+
+def diff_frames(
+    ref: pd.DataFrame,
+    cand: pd.DataFrame,
+    rtol: float = 0.0,
+    atol: float = 0.0,
+) -> tuple[bool, float, str]:
+    """
+    Compare two frames row by row: same columns and length, numeric columns
+    equal within rtol/atol (NaN == NaN), everything else exactly equal.
+
+    Returns: (match, max absolute numeric difference, first difference found)
+    """
+    if list(ref.columns) != list(cand.columns):
+        return False, float("nan"), f"columns differ: {list(ref.columns)} vs {list(cand.columns)}"
+    if len(ref) != len(cand):
+        return False, float("nan"), f"{len(ref)} rows vs {len(cand)}"
+
+    max_diff = 0.0
+    first = ""
+    for col in ref.columns:
+        a, b = ref[col].to_numpy(), cand[col].to_numpy()
+        if pd.api.types.is_numeric_dtype(ref[col]) and pd.api.types.is_numeric_dtype(cand[col]) \
+                and not pd.api.types.is_bool_dtype(ref[col]):
+            a, b = a.astype(np.float64), b.astype(np.float64)
+            ok = np.isclose(a, b, rtol=rtol, atol=atol, equal_nan=True)
+            both = ~np.isnan(a) & ~np.isnan(b)
+            if both.any():
+                max_diff = max(max_diff, float(np.abs(a[both] - b[both]).max()))
+        else:
+            ok = (a == b) | (pd.isna(a) & pd.isna(b))
+        if not ok.all() and not first:
+            row = int(np.flatnonzero(~ok)[0])
+            first = f"row {row}, {col}: {a[row]!r} vs {b[row]!r} ({int((~ok).sum())} rows differ)"
+    return not first, max_diff, first
+
+
+def compare_engines(
+    case: str,
+    df: pd.DataFrame,
+    config: BacktestConfig,
+    candidates: dict,
+    rtol: float = 0.0,
+    atol: float = 0.0,
+) -> list[CaseResult]:
+    """run_backtest(fast=False) vs each engine candidate on one scored frame."""
+    t0 = time.perf_counter()
+    ref_trades, ref_port = run_backtest(df, config, fast=False)
+    ref_seconds = time.perf_counter() - t0
+
+    results = []
+    for name, fn in candidates.items():
+        t0 = time.perf_counter()
+        trades, port = fn(df, config)
+        seconds = time.perf_counter() - t0
+        ok_t, diff_t, first_t = diff_frames(ref_trades, trades, rtol, atol)
+        ok_p, diff_p, first_p = diff_frames(ref_port, port, rtol, atol)
+        results.append(CaseResult(
+            case=case, kind="engine", candidate=name, match=ok_t and ok_p,
+            rows=len(ref_trades), max_abs_diff=max(diff_t, diff_p),
+            reference_seconds=ref_seconds, candidate_seconds=seconds,
+            first_diff=(f"trades: {first_t}" if first_t else f"portfolio: {first_p}" if first_p else ""),
+        ))
+    return results
+
+
+def compare_signals(
+    case: str,
+    df: pd.DataFrame,
+    config: BacktestConfig,
+    candidates: dict,
+    rtol: float = 1e-5,
+    atol: float = 1e-5,
+) -> tuple[pd.DataFrame, list[CaseResult]]:
+    """
+    compute_os_scores vs each signal candidate on one price frame.
+
+    Returns the reference scores (input of the engine comparison) and results.
+    """
+    t0 = time.perf_counter()
+    ref = compute_os_scores(df.copy(), config)
+    ref_seconds = time.perf_counter() - t0
+    cols = list(SIGNAL_COLUMNS)
+
+    results = []
+    for name, fn in candidates.items():
+        t0 = time.perf_counter()
+        scored = fn(df.copy(), config)
+        seconds = time.perf_counter() - t0
+        a, b = ref[["ticker", "date"] + cols].copy(), scored[["ticker", "date"] + cols].copy()
+        degenerate = _degenerate_windows(a, b)
+        a.loc[degenerate, ["D_r", "D_v", "os_score"]] = np.nan
+        b.loc[degenerate, ["D_r", "D_v", "os_score"]] = np.nan
+        match, max_diff, first = diff_frames(a, b, rtol, atol)
+        if match and degenerate.any():
+            first = f"{int(degenerate.sum())} constant windows: 0.0 vs NaN"
+        results.append(CaseResult(
+            case=case, kind="signals", candidate=name, match=match, rows=len(ref),
+            max_abs_diff=max_diff, reference_seconds=ref_seconds, candidate_seconds=seconds,
+            first_diff=first,
+        ))
+    return ref, results
+
+
+def _degenerate_windows(ref: pd.DataFrame, cand: pd.DataFrame) -> np.ndarray:
+    """
+    Rows where a z-score is 0.0 in ref and NaN in cand.
+
+    On a window of N equal values the z-score is 0/0. rolling().std() is
+    exactly 0 there (NaN score) unless its online update leaves a small
+    residue after large values leave the window, which gives 0.0 instead.
+    Either answer is acceptable; such rows are never entered (constant volume
+    or zero returns) and are excluded from the comparison.
+    """
+    mask = np.zeros(len(ref), dtype=bool)
+    for col in ("D_r", "D_v"):
+        if col in cand.columns:
+            mask |= (ref[col].to_numpy() == 0) & cand[col].isna().to_numpy()
+    return mask
+
+
+def run_harness(
+    seeds=(0, 1, 2),
+    n_tickers: int = 200,
+    n_days: int = 500,
+    data_paths=(),
+    engines: "list[str] | None" = None,
+    signals: "list[str] | None" = None,
+    rtol: float = 0.0,
+    atol: float = 0.0,
+    signal_rtol: float = 1e-5,
+    signal_atol: float = 1e-5,
+) -> pd.DataFrame:
+    """
+    Run every case and return one row per (case, candidate).
+
+    Engine candidates are compared exactly by default (rtol = atol = 0): the
+    optimized engines are meant to be bit-for-bit equal to the reference.
+    """
+    engine_fns = {k: ENGINE_CANDIDATES[k] for k in (engines or ENGINE_CANDIDATES)}
+    signal_fns = {k: SIGNAL_CANDIDATES[k] for k in (signals if signals is not None else SIGNAL_CANDIDATES)}
+    results: list[CaseResult] = []
+
+    def _run_case(case: str, config: BacktestConfig) -> None:
+        df = load_price_data(config)
+        scored, case_results = compare_signals(case, df, config, signal_fns, signal_rtol, signal_atol)
+        case_results += compare_engines(case, scored, config, engine_fns, rtol, atol)
+        results.extend(case_results)
+        for r in case_results:
+            status = "OK  " if r.match else "DIFF"
+            print(f"{status} {r.case:<24} {r.kind:<7} {r.candidate:<10} rows={r.rows:<6} "
+                  f"speedup={r.speedup:6.1f}x  {r.first_diff}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for seed in seeds:
+            rng = np.random.default_rng(seed)
+            universe = make_synthetic_universe(n_tickers, n_days, seed)
+            for fmt in ("csv", "parquet"):
+                path = Path(tmp) / f"synthetic_{seed}.{fmt}"
+                if fmt == "csv":
+                    universe.to_csv(path, index=False)
+                else:
+                    universe.to_parquet(path, index=False)
+                _run_case(f"synthetic_{seed}_{fmt}", random_config(rng, str(path)))
+
+    for path in data_paths:
+        _run_case(Path(path).name, BacktestConfig(data_path=str(path)))
+
+    return pd.DataFrame([{**dataclasses.asdict(r), "speedup": r.speedup} for r in results])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check optimized engines / signals against the reference")
+    parser.add_argument("--seeds", type=int, default=3, help="Number of synthetic universes (default: 3)")
+    parser.add_argument("--tickers", type=int, default=200, help="Tickers per synthetic universe")
+    parser.add_argument("--days", type=int, default=500, help="Trading days per synthetic universe")
+    parser.add_argument("--data_path", type=str, nargs="*", default=[],
+                        help="Prepared price files to check as well (e.g. data/v1/prices.csv)")
+    parser.add_argument("--engines", choices=list(ENGINE_CANDIDATES), nargs="*", default=None)
+    parser.add_argument("--signals", choices=list(SIGNAL_CANDIDATES), nargs="*", default=None)
+    parser.add_argument("--rtol", type=float, default=0.0, help="Engine output relative tolerance")
+    parser.add_argument("--atol", type=float, default=0.0, help="Engine output absolute tolerance")
+    parser.add_argument("--signal_rtol", type=float, default=1e-5, help="Signal column relative tolerance")
+    parser.add_argument("--signal_atol", type=float, default=1e-5, help="Signal column absolute tolerance")
+    args = parser.parse_args()
+
+    table = run_harness(
+        seeds=range(args.seeds), n_tickers=args.tickers, n_days=args.days,
+        data_paths=args.data_path, engines=args.engines, signals=args.signals,
+        rtol=args.rtol, atol=args.atol, signal_rtol=args.signal_rtol, signal_atol=args.signal_atol,
+    )
+    n_diff = int((~table["match"]).sum())
+    print(f"{len(table)} comparisons, {n_diff} with differences")
+    summary = table.groupby(["kind", "candidate"])["speedup"].median()
+    print("Median speedup vs reference:")
+    print(summary.to_string())
+    sys.exit(1 if n_diff else 0)
+
+
+if __name__ == "__main__":
+    main()
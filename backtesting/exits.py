@@ -0,0 +1,103 @@
+import dataclasses
+
+import numpy as np
+
+from backtesting.config import BacktestConfig
+from backtesting.panel import PricePanel
+
+# Exit reason codes stored in ExitPlan.reason (index into this tuple)
+EXIT_REASONS = (
+    "gap_down_stop", "gap_up_tp", "intraday_tp", "intraday_sl", "max_hold", "forced_close",
+)
+GAP_DOWN_STOP, GAP_UP_TP, INTRADAY_TP, INTRADAY_SL, MAX_HOLD, FORCED_CLOSE = range(len(EXIT_REASONS))
+
+
+@dataclasses.dataclass
+class ExitPlan:
+    """
+    Outcome of every resolved entry, indexed by the entry cell (t, j) of a PricePanel.
+
+    exit_t is the date index the position is closed on, or n_dates if it is
+    still open after the last date (force-closed at the last close once the
+    loop ends). Unresolved cells have exit_t == -1.
+    """
+    exit_t: np.ndarray          # int32 (T, J)
+    fill: np.ndarray            # (T, J), same dtype as panel.close
+    reason: np.ndarray          # int8 (T, J), index into EXIT_REASONS
+
+
+def entry_mask(panel: PricePanel, config: BacktestConfig) -> np.ndarray:
+    """
+    Cells (t, j) the dense engine may buy: the ticker passes the Phase 3
+    filters on T-1 (volume > V, close >= min_price, os_score not NaN) and
+    trades on T. Row 0 is all False (no T-1 data).
+    """
+    eligible = (panel.volume > config.V) & (panel.close >= config.min_price) & ~np.isnan(panel.os_score)
+    mask = np.zeros_like(panel.present)
+    mask[1:] = eligible[:-1] & panel.present[1:]
+    return mask
+
+
+def resolve_exits(panel: PricePanel, config: BacktestConfig, mask: "np.ndarray | None" = None) -> ExitPlan:
+    """
+    Resolve the exit of a position bought at close of (t, j) for every cell in
+    `mask` (default: every present cell) in one batched pass over hold days.
+
+    An exit never depends on cash or other positions, only on the entry price,
+    the following K days of OHLC and TP/SL/K, so it can be computed before the
+    portfolio loop. Each hold day k applies check_exit's priority to all
+    still-open entries at once:
+      0. Ticker missing on t+k:  forced_close at entry price (delisted)
+      1. Gap-down stop -> 2. Gap-up TP -> 3. Intraday TP -> 4. Intraday SL
+      5. Max hold (k >= K) at close
+    """
+    n_dates, n_tickers = panel.present.shape
+    if mask is None:
+        mask = panel.present
+    t0, j = np.nonzero(mask)
+
+    entry = panel.close[t0, j]
+    tp_price = entry * (1 + config.win_take_rate)
+    sl_price = entry * (1 - config.stop_loss_rate)
+
+    # Default outcome: still open after the last date
+    exit_t = np.full(len(t0), n_dates, dtype=np.int32)
+    fill = panel.close[n_dates - 1, j] if n_dates else entry.copy()
+    reason = np.full(len(t0), FORCED_CLOSE, dtype=np.int8)
+    is_open = np.ones(len(t0), dtype=bool)
+
+    for k in range(1, max(config.K, 1) + 1):
+        live = np.flatnonzero(is_open & (t0 + k < n_dates))
+        if len(live) == 0:
+            break
+        tk, jk = t0[live] + k, j[live]
+        o, h, l, c = panel.open[tk, jk], panel.high[tk, jk], panel.low[tk, jk], panel.close[tk, jk]
+        tp, sl = tp_price[live], sl_price[live]
+
+        conditions = [
+            ~panel.present[tk, jk],
+            o <= sl,
+            o >= tp,
+            h >= tp,
+            l <= sl,
+            np.full(len(live), k >= config.K),
+        ]
+        fills = [entry[live], o, o, tp, sl, c]
+        codes = [FORCED_CLOSE, GAP_DOWN_STOP, GAP_UP_TP, INTRADAY_TP, INTRADAY_SL, MAX_HOLD]
+
+        hit = np.logical_or.reduce(conditions)
+        done = live[hit]
+        exit_t[done] = tk[hit]
+        fill[done] = np.select(conditions, fills)[hit]
+        reason[done] = np.select(conditions, codes)[hit]
+        is_open[done] = False
+
+    plan = ExitPlan(
+        exit_t=np.full((n_dates, n_tickers), -1, dtype=np.int32),
+        fill=np.full((n_dates, n_tickers), np.nan, dtype=panel.close.dtype),
+        reason=np.full((n_dates, n_tickers), -1, dtype=np.int8),
+    )
+    plan.exit_t[t0, j] = exit_t
+    plan.fill[t0, j] = fill
+    plan.reason[t0, j] = reason
+    return plan
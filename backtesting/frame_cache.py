@@ -0,0 +1,121 @@
+"""
+In-process LRU cache of loaded and scored frames for long-lived drivers.
+
+The Streamlit app calls execute_run once per click; with config.frame_cache
+the frames it builds stay in memory for the next call:
+
+    loaded frame   key: (data fingerprint, start_date, end_date)
+    scored frame   key: loaded key + (N, signal_kernel, and V / min_price
+                   with prune_universe)
+
+A run that only changes exits (win_take_rate, stop_loss_rate, K, ...) hits
+the scored frame and skips loading and scoring; one that changes w1 / w2
+also hits it, os_score being rebuilt from D_r and D_v; one that changes N
+reuses the loaded frame. The data fingerprint is the path, size and mtime
+of the data (signal_cache.data_fingerprint), so rewriting the file misses.
+
+Frames are held up to frame_cache_mb (memory_usage of each frame; columns
+shared between frames are counted in each), least recently used first out.
+The process has one cache, created by the first frame_cache(config) call
+with that config's frame_cache_mb; later configs do not resize it.
+stats() reports hits, misses and the bytes held. Every operation holds a
+lock: Streamlit runs each session on its own thread.
+"""
+
+import json
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from backtesting.config import BacktestConfig
+from backtesting.signal_cache import data_fingerprint
+
+
+class FrameCache:
+    """A byte-bounded, thread-safe LRU map of DataFrames with hit / miss counters."""
+
+    def __init__(self, max_bytes: int = 2048 * 2**20):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[tuple, tuple[pd.DataFrame, int]]" = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> "pd.DataFrame | None":
+        """
+        A shallow copy of the frame under key, or None. Callers may add or
+        replace columns of the copy without touching the cached frame.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            df = entry[0]
+        return df.copy(deep=False)
+
+    def put(self, key: tuple, df: pd.DataFrame) -> None:
+        """Hold df under key, then drop least recently used frames down to max_bytes."""
+        nbytes = int(df.memory_usage(index=True, deep=True).sum())
+        df = df.copy(deep=False)  # later column changes to the caller's frame stay out
+        with self._lock:
+            self._pop(key)
+            if nbytes > self.max_bytes:  # would evict everything and still not fit
+                return
+            self._entries[key] = (df, nbytes)
+            self._nbytes += nbytes
+            while self._nbytes > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    @property
+    def nbytes(self) -> int:
+        return self._nbytes
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "mb": round(self._nbytes / 2**20, 1),
+                "max_mb": round(self.max_bytes / 2**20, 1),
+            }
+
+    def _pop(self, key: tuple) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._nbytes -= entry[1]
+
+
+# One per process, shared by every execute_run call of a long-lived driver
+_FRAME_CACHE: "FrameCache | None" = None
+_FRAME_CACHE_LOCK = threading.Lock()
+
+
+def frame_cache(config: BacktestConfig) -> FrameCache:
+    """The process's frame cache, created with config.frame_cache_mb on first use."""
+    global _FRAME_CACHE
+    with _FRAME_CACHE_LOCK:
+        if _FRAME_CACHE is None:
+            _FRAME_CACHE = FrameCache(config.frame_cache_mb * 2**20)
+        return _FRAME_CACHE
+
+
+def loaded_key(config: BacktestConfig) -> tuple:
+    """Key of load_price_data(config)."""
+    return ("loaded", json.dumps(data_fingerprint(config.data_path)), config.start_date, config.end_date)
+
+
+def scored_key(config: BacktestConfig) -> tuple:
+    """Key of the (pruned, if enabled) scored frame of config; os_score is rebuilt per w1 / w2."""
+    prune = (config.V, config.min_price) if config.prune_universe else None
+    return ("scored", *loaded_key(config)[1:], config.N, config.signal_kernel, prune)
@@ -0,0 +1,150 @@
+"""
+Out-of-core scoring: write the date-sorted scored parquet of a price file
+one chunk of trading days at a time.
+
+Usage:
+    python -m backtesting.outofcore --data_path data/v3/prices.parquet \
+        --out data/v3/scored.parquet --N 20 --chunk_days 252
+
+    python -m backtesting.run --engine stream --data_path data/v3/scored.parquet
+
+Each chunk is loaded with load_price_data over its own date range, prefixed
+with a halo of the last N+1 rows of every ticker seen so far, scored with
+compute_os_scores, and only its own dates are appended to the output. The
+halo covers pct_change (one earlier close) and the N-row windows of the
+chunk's first rows, so r is exact and D_r / D_v / os_score equal the
+in-memory scores up to float rounding, as with resume_run's warm-up.
+
+Memory holds one chunk plus the halo (tickers x (N+1) rows), so it does
+not grow with history length. Every chunk reads through the price file
+with a date filter; use parquet input, a CSV is parsed in full per chunk.
+The output is the same file save_scored_by_date writes for the whole frame.
+"""
+
+import argparse
+import dataclasses
+import gc
+from pathlib import Path
+
+import pandas as pd
+
+from backtesting.config import BacktestConfig
+from backtesting.data_loader import load_price_data, parquet_files, scored_table
+from backtesting.signal_cache import temp_path
+from backtesting.signals import compute_os_scores
+
+
+def score_to_parquet(
+    config: BacktestConfig,
+    out_path,
+    chunk_days: int = 252,
+    row_group_size: int = 65_536,
+    status=print,
+) -> Path:
+    """
+    Score config.data_path between start_date and end_date into a
+    date-sorted scored parquet at out_path, chunk_days trading days at a time.
+    """
+    import pyarrow.parquet as pq
+
+    if chunk_days < 1:
+        raise ValueError(f"chunk_days must be positive, got {chunk_days}")
+    dates = trading_dates(config.data_path, config.start_date, config.end_date)
+    if not len(dates):
+        raise ValueError(f"No trading days in {config.data_path} between {config.start_date} and {config.end_date}")
+
+    out_path = Path(out_path)
+    tmp = temp_path(out_path)
+    writer = None
+    halo = None  # last N+1 input rows of every ticker seen so far
+    try:
+        for start in range(0, len(dates), chunk_days):
+            stop = min(start + chunk_days, len(dates))
+            first, last = dates[start], dates[stop - 1]
+            status(f"Scoring {first.date()}..{last.date()} (days {start + 1}-{stop} of {len(dates)})")
+            chunk = load_price_data(dataclasses.replace(
+                config, start_date=first.strftime("%Y-%m-%d"), end_date=last.strftime("%Y-%m-%d"),
+            ))
+            # Plain strings: categories differ from chunk to chunk
+            for col in ("ticker", "name", "sector", "industry"):
+                chunk[col] = chunk[col].astype(object)
+            columns = list(chunk.columns)
+            if halo is not None:
+                chunk = pd.concat([halo, chunk], ignore_index=True)
+
+            scored = compute_os_scores(chunk, config)
+            del chunk
+            halo = scored.groupby("ticker", sort=False).tail(config.N + 1)[columns].reset_index(drop=True)
+
+            table = scored_table(scored[scored["date"] >= first])
+            del scored
+            if writer is None:
+                writer = pq.ParquetWriter(tmp, table.schema)
+            writer.write_table(table.cast(writer.schema), row_group_size=row_group_size)
+            del table
+            gc.collect()
+    except BaseException:
+        if writer is not None:
+            writer.close()
+        tmp.unlink(missing_ok=True)
+        raise
+    writer.close()
+    tmp.replace(out_path)
+    return out_path
+
+
+def trading_dates(data_path, start_date: "str | None" = None, end_date: "str | None" = None) -> pd.DatetimeIndex:
+    """Sorted distinct dates of a price file or partitioned directory, read from its date column only."""
+    path = Path(data_path)
+    if not path.exists():
+        raise FileNotFoundError(f"{path} not found. Run: python data/v3/preprocess.py --source fake")
+
+    if path.is_dir() or path.suffix == ".parquet":
+        import pyarrow.compute as pc
+        import pyarrow.parquet as pq
+
+        seen = [
+            pc.unique(batch.column(0)).to_pandas()
+            for file in parquet_files(path, start_date, end_date)
+            for batch in pq.ParquetFile(file).iter_batches(columns=["date"])
+        ]
+        dates = pd.DatetimeIndex(pd.concat(seen, ignore_index=True).unique() if seen else [])
+    else:
+        dates = pd.DatetimeIndex(pd.read_csv(path, usecols=["date"], parse_dates=["date"])["date"].unique())
+
+    if start_date:
+        dates = dates[dates >= pd.Timestamp(start_date)]
+    if end_date:
+        dates = dates[dates <= pd.Timestamp(end_date)]
+    return dates.sort_values()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write a date-sorted scored parquet in chunks of trading days")
+    parser.add_argument("--data_path", type=str, default="data/v3/prices.parquet")
+    parser.add_argument("--out", type=str, required=True, help="Scored parquet to write (--engine stream input)")
+    parser.add_argument("--N", type=int, default=20, help="Lookback window (default: 20)")
+    parser.add_argument("--w1", type=float, default=-1.0, help="Return weight (default: -1.0)")
+    parser.add_argument("--w2", type=float, default=1.0, help="Volume weight (default: 1.0)")
+    parser.add_argument("--signal_kernel", choices=["pandas", "cumsum"], default="pandas")
+    parser.add_argument("--start_date", type=str, default=None)
+    parser.add_argument("--end_date", type=str, default=None)
+    parser.add_argument("--chunk_days", type=int, default=252,
+                        help="Trading days scored per chunk (default: 252)")
+    args = parser.parse_args()
+
+    config = BacktestConfig(
+        N=args.N,
+        w1=args.w1,
+        w2=args.w2,
+        signal_kernel=args.signal_kernel,
+        start_date=args.start_date,
+        end_date=args.end_date,
+        data_path=args.data_path,
+    )
+    path = score_to_parquet(config, args.out, chunk_days=args.chunk_days)
+    print(f"Wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
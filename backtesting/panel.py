@@ -0,0 +1,171 @@
+import dataclasses
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+# Hot columns pivoted into dense (date x ticker) arrays. Volume is stored as
+# float64 so missing cells can hold NaN without changing comparison results.
+PRICE_COLUMNS = ("open", "high", "low", "close")
+# Per-row attributes copied onto a Position at entry; read through `row`.
+ENTRY_COLUMNS = ("r", "volume", "D_r", "D_v", "os_score", "name", "industry")
+
+
+@dataclasses.dataclass
+class PricePanel:
+    """
+    Scored price data pivoted once into dense (date x ticker) NumPy arrays.
+
+    Row t is dates[t], column j is tickers[j]. Columns follow the ticker sort
+    order of the scored frame, so ties in os_score resolve exactly as
+    DataFrame.nlargest does in the reference engine. Cells for tickers that
+    did not trade on a date are NaN and `present` is False.
+    """
+    dates: list
+    tickers: np.ndarray
+    present: np.ndarray         # bool (T, J)
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray          # float64 (T, J)
+    os_score: np.ndarray
+    row: np.ndarray             # int64 (T, J): row in `columns` arrays, -1 if absent
+    columns: dict               # ENTRY_COLUMNS name -> 1-D array over source rows
+
+    @property
+    def n_dates(self) -> int:
+        return len(self.dates)
+
+    @property
+    def n_tickers(self) -> int:
+        return len(self.tickers)
+
+    def slice(self, start: int, stop: int) -> "PricePanel":
+        """Dates [start, stop) as a panel of array views (no copy of the data)."""
+        return dataclasses.replace(
+            self,
+            dates=self.dates[start:stop],
+            present=self.present[start:stop],
+            open=self.open[start:stop],
+            high=self.high[start:stop],
+            low=self.low[start:stop],
+            close=self.close[start:stop],
+            volume=self.volume[start:stop],
+            os_score=self.os_score[start:stop],
+            row=self.row[start:stop],
+        )
+
+    def entry_value(self, t: int, j: int, col: str, default=0.0):
+        """Return column `col` of the source row at (t, j), like prev_row.get(col, default)."""
+        values = self.columns.get(col)
+        if values is None:
+            return default
+        return values[self.row[t, j]]
+
+
+def build_panel(df: pd.DataFrame) -> PricePanel:
+    """
+    Pivot a scored frame (output of compute_os_scores) into a PricePanel.
+
+    Price arrays keep the frame's column dtype (float32 from parquet, float64
+    from CSV) so scalar arithmetic in the dense engine matches the reference
+    engine bit for bit.
+    """
+    t_idx, dates = pd.factorize(df["date"], sort=True)
+    j_idx, tickers = pd.factorize(df["ticker"], sort=True)
+    shape = (len(dates), len(tickers))
+
+    def _pivot(values: np.ndarray, dtype) -> np.ndarray:
+        out = np.full(shape, np.nan, dtype=dtype)
+        out[t_idx, j_idx] = values
+        return out
+
+    present = np.zeros(shape, dtype=bool)
+    present[t_idx, j_idx] = True
+    row = np.full(shape, -1, dtype=np.int64)
+    row[t_idx, j_idx] = np.arange(len(df), dtype=np.int64)
+
+    prices = {}
+    for col in PRICE_COLUMNS:
+        values = df[col].to_numpy()
+        prices[col] = _pivot(values, values.dtype)
+    os_values = df["os_score"].to_numpy()
+
+    return PricePanel(
+        dates=list(dates),
+        tickers=np.asarray(tickers, dtype=object),
+        present=present,
+        volume=_pivot(df["volume"].to_numpy(dtype=np.float64), np.float64),
+        os_score=_pivot(os_values, os_values.dtype),
+        row=row,
+        columns={col: df[col].to_numpy() for col in ENTRY_COLUMNS if col in df.columns},
+        **prices,
+    )
+
+
+def share_panel(panel: PricePanel) -> tuple[list, dict]:
+    """
+    Copy the numeric arrays of panel into shared memory blocks.
+
+    Returns (blocks, spec): the caller closes and unlinks the blocks when
+    done; spec is a small picklable description that attach_panel turns back
+    into a panel in another process. Object arrays (tickers, name / industry)
+    and dates travel in spec as they are.
+    """
+    blocks = []
+
+    def _share(values: np.ndarray):
+        if values.dtype == object:
+            return values
+        block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        blocks.append(block)
+        np.ndarray(values.shape, values.dtype, buffer=block.buf)[...] = values
+        return (block.name, values.shape, values.dtype.str)
+
+    try:
+        spec = {
+            field.name: _share(getattr(panel, field.name))
+            for field in dataclasses.fields(panel)
+            if isinstance(getattr(panel, field.name), np.ndarray)
+        }
+        spec["columns"] = {col: _share(values) for col, values in panel.columns.items()}
+    except BaseException:
+        release_panel(blocks)
+        raise
+    spec["dates"] = panel.dates
+    return blocks, spec
+
+
+def attach_panel(spec: dict) -> tuple[PricePanel, list]:
+    """
+    The panel described by a share_panel spec, as views of its shared blocks.
+
+    Returns (panel, blocks); the blocks must stay referenced for as long as
+    the panel is used. The shared arrays are read-only.
+    """
+    blocks = []
+
+    def _attach(item):
+        if isinstance(item, np.ndarray):
+            return item
+        name, shape, dtype = item
+        block = shared_memory.SharedMemory(name=name)
+        blocks.append(block)
+        values = np.ndarray(shape, np.dtype(dtype), buffer=block.buf)
+        values.flags.writeable = False  # shared by every attached process
+        return values
+
+    fields = {
+        name: item if name == "dates" else _attach(item)
+        for name, item in spec.items() if name != "columns"
+    }
+    columns = {col: _attach(item) for col, item in spec["columns"].items()}
+    return PricePanel(columns=columns, **fields), blocks
+
+
+def release_panel(blocks: list) -> None:
+    """Close and unlink blocks created by share_panel."""
+    for block in blocks:
+        block.close()
+        block.unlink()
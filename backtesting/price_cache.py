@@ -0,0 +1,108 @@
+"""
+Memory-mapped cache of the loaded price frame.
+
+load_price_data decodes the source, downcasts prices / volume, sorts by
+(ticker, date) and builds the category columns on every call. The cache
+writes that finished frame once as an uncompressed Arrow IPC (Feather v2)
+file holding a single record batch; later loads memory-map it, so the
+columns are views of the OS page cache instead of decoded copies:
+
+    df = cached_price_data(config)    # same frame as load_price_data(config)
+
+A hit costs a file open rather than a decode, and concurrent runs on the
+same data share the mapped pages instead of each holding a private copy
+(only the boolean columns and category labels are copied per process).
+The mapped columns are read-only (pandas 3 copies a column on write; on 2.x
+an in-place write raises). Pruning and scoring keep them uncopied: both
+reindex through data_loader.with_range_index rather than reset_index.
+
+Entries are .arrow files in a .price_cache folder next to the dataset,
+named by a hash of (data fingerprint, start_date, end_date) — see
+signal_cache.data_fingerprint — so rewriting the data invalidates them.
+The folder is bounded by price_cache_mb: after each write the least
+recently used entries (file mtime, refreshed on every hit) are deleted.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from backtesting.config import BacktestConfig
+from backtesting.data_loader import load_price_data
+from backtesting.signal_cache import data_fingerprint, evict_lru, temp_path
+
+CACHE_DIRNAME = ".price_cache"
+
+
+class PriceCache:
+    """A folder of memory-mappable price frames; see the module docstring."""
+
+    def __init__(self, root, max_bytes: int = 4096 * 2**20):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+
+    @classmethod
+    def for_config(cls, config: BacktestConfig) -> "PriceCache":
+        """The cache next to config.data_path, bounded by config.price_cache_mb."""
+        return cls(Path(config.data_path).parent / CACHE_DIRNAME, config.price_cache_mb * 2**20)
+
+    def key(self, config: BacktestConfig) -> str:
+        parts = {
+            "data": data_fingerprint(config.data_path),
+            "start_date": config.start_date,
+            "end_date": config.end_date,
+        }
+        return hashlib.sha1(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+    def get(self, key: str) -> "pd.DataFrame | None":
+        """The cached frame for key, memory-mapped, or None if absent or unreadable."""
+        import pyarrow as pa
+
+        path = self._path(key)
+        try:
+            table = pa.ipc.open_file(pa.memory_map(str(path))).read_all()
+        except (OSError, ValueError):  # absent, or a truncated / foreign file
+            return None
+        os.utime(path)  # LRU stamp
+        # One record batch per column: split_blocks keeps every numeric column a zero-copy view
+        return table.to_pandas(split_blocks=True)
+
+    def put(self, key: str, df: pd.DataFrame) -> None:
+        """Store a loaded frame, then evict down to max_bytes."""
+        import pyarrow.feather as feather
+
+        path = self._path(key)
+        tmp = temp_path(path)
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            feather.write_feather(df, tmp, compression="uncompressed", chunksize=max(len(df), 1))
+            os.replace(tmp, path)
+        except OSError:  # read-only data folder: run uncached
+            tmp.unlink(missing_ok=True)
+            return
+        self.evict(keep=path)
+
+    def evict(self, keep: "Path | None" = None) -> None:
+        """Delete least recently used entries until the folder fits in max_bytes."""
+        evict_lru(self.root, "*.arrow", self.max_bytes, keep=keep)
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}.arrow"
+
+
+def cached_price_data(config: BacktestConfig, cache: "PriceCache | None" = None) -> pd.DataFrame:
+    """load_price_data(config) through the price cache."""
+    if not Path(config.data_path).exists():
+        return load_price_data(config)  # raises with the preprocess hint
+    if cache is None:
+        cache = PriceCache.for_config(config)
+    key = cache.key(config)
+
+    df = cache.get(key)
+    if df is None:
+        df = load_price_data(config)
+        cache.put(key, df)
+    return df
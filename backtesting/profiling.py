@@ -0,0 +1,125 @@
+"""
+Built-in run instrumentation: wall time and peak memory per pipeline stage,
+plus wall time per engine phase summed over the simulated days.
+
+    profiler = RunProfiler(trace_memory=config.profile_memory)
+    with profiler.stage("load"):
+        df = load_price_data(config)
+    ...
+    profiler.as_dict()   # -> stored under "timings" in config.json
+
+Memory per stage, from /proc (Linux):
+    peak_rss_mb      the RSS high-water mark of the stage: it is reset
+                     before the stage (echo 5 > /proc/self/clear_refs)
+    rss_before_mb,   current RSS at the start and end of the stage, where
+    rss_after_mb     the reset is not permitted
+Neither is recorded without /proc. The high-water mark is per process, so
+stages of concurrent runs in one process (Streamlit sessions) see each
+other's peaks. With trace_memory, tracemalloc also reports the peak of
+Python and NumPy allocations made inside each stage; it slows pandas-heavy
+stages noticeably, so it is off by default.
+"""
+
+import contextlib
+import time
+import tracemalloc
+
+
+class PhaseClock:
+    """Accumulates wall time per named phase across the iterations of a loop."""
+    __slots__ = ("totals", "_last")
+
+    def __init__(self):
+        self.totals: dict[str, float] = {}
+        self._last = time.perf_counter()
+
+    def start(self) -> None:
+        self._last = time.perf_counter()
+
+    def lap(self, phase: str) -> None:
+        """Charge the time since the previous lap (or start) to `phase`."""
+        now = time.perf_counter()
+        self.totals[phase] = self.totals.get(phase, 0.0) + (now - self._last)
+        self._last = now
+
+
+class _NullClock:
+    __slots__ = ()
+
+    def start(self) -> None:
+        pass
+
+    def lap(self, phase: str) -> None:
+        pass
+
+
+NULL_CLOCK = _NullClock()
+
+
+class RunProfiler:
+    """Stage timings of one run; see the module docstring."""
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.stages: dict[str, dict] = {}
+        self.engine = PhaseClock()
+        self._started = time.perf_counter()
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        elif self.trace_memory:
+            tracemalloc.reset_peak()
+        peak_reset = _reset_peak_rss()
+        rss_before = None if peak_reset else _status_mb("VmRSS")
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry = {"seconds": round(time.perf_counter() - t0, 4)}
+            if self.trace_memory:
+                entry["peak_traced_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 1)
+                if tracing:
+                    tracemalloc.stop()
+            if peak_reset:
+                entry["peak_rss_mb"] = _status_mb("VmHWM")
+            elif rss_before is not None:
+                entry["rss_before_mb"] = rss_before
+                entry["rss_after_mb"] = _status_mb("VmRSS")
+            self.stages[name] = entry
+
+    def engine_clock(self) -> PhaseClock:
+        """Clock the engine charges its per-day phases to (reset on each call)."""
+        self.engine = PhaseClock()
+        return self.engine
+
+    def as_dict(self) -> dict:
+        return {
+            "total_seconds": round(time.perf_counter() - self._started, 4),
+            "stages": dict(self.stages),
+            "engine_phases": {k: round(v, 4) for k, v in self.engine.totals.items()},
+        }
+
+
+def _reset_peak_rss() -> bool:
+    """Reset the process's RSS high-water mark (Linux 4.0+); False where not permitted."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        return False
+    return True
+
+
+def _status_mb(field: str) -> "float | None":
+    """A kB field of /proc/self/status (VmRSS, VmHWM) in MB, or None without /proc."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return round(int(line.split()[1]) / 2**10, 1)
+    except OSError:
+        pass
+    return None
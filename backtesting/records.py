@@ -0,0 +1,169 @@
+import numpy as np
+import pandas as pd
+
+# Output column order of trades.csv / portfolio.csv, with round() digits (None = as is)
+TRADE_COLUMNS = {
+    "ticker": None,
+    "company_name": None,
+    "industry": None,
+    "entry_date": None,
+    "entry_price": 4,
+    "exit_date": None,
+    "exit_price": 4,
+    "shares": None,
+    "pnl": 2,
+    "pnl_pct": 6,
+    "exit_reason": None,
+    "days_held": None,
+    "r_prev": 6,
+    "v_prev": None,
+    "dr_prev": 6,
+    "dv_prev": 6,
+    "os_prev": 6,
+}
+SNAPSHOT_COLUMNS = {
+    "date": None,
+    "cash": 2,
+    "position_value": 2,
+    "total_value": 2,
+}
+DATE_COLUMNS = ("entry_date", "exit_date", "date")
+
+
+class TradeLog:
+    """
+    Closed trades stored column by column and converted to a DataFrame in one step.
+
+    Values are kept as the engine produced them (NumPy or Python scalars);
+    rounding and date formatting happen once per column in to_frame(), in
+    each value's own precision, so the frame equals the one a list of
+    per-trade dicts would give.
+    """
+    __slots__ = ("columns",)
+
+    def __init__(self):
+        self.columns = {name: [] for name in TRADE_COLUMNS}
+
+    def __len__(self) -> int:
+        return len(self.columns["ticker"])
+
+    def append(self, pos, exit_date, exit_price, reason: str) -> None:
+        c = self.columns
+        c["ticker"].append(pos.ticker)
+        c["company_name"].append(pos.company_name)
+        c["industry"].append(pos.industry)
+        c["entry_date"].append(pos.entry_date)
+        c["entry_price"].append(pos.entry_price)
+        c["exit_date"].append(exit_date)
+        c["exit_price"].append(exit_price)
+        c["shares"].append(pos.shares)
+        c["pnl"].append((exit_price - pos.entry_price) * pos.shares)
+        c["pnl_pct"].append(exit_price / pos.entry_price - 1)
+        c["exit_reason"].append(reason)
+        c["days_held"].append(pos.days_held)
+        c["r_prev"].append(pos.r_prev)
+        c["v_prev"].append(pos.v_prev)
+        c["dr_prev"].append(pos.dr_prev)
+        c["dv_prev"].append(pos.dv_prev)
+        c["os_prev"].append(pos.os_prev)
+
+    def copy(self) -> "TradeLog":
+        log = TradeLog()
+        log.columns = {name: list(values) for name, values in self.columns.items()}
+        return log
+
+    def to_frame(self) -> pd.DataFrame:
+        return _to_frame(self.columns, TRADE_COLUMNS)
+
+
+class SnapshotLog:
+    """Daily portfolio snapshots, stored column by column (see TradeLog)."""
+    __slots__ = ("columns",)
+
+    def __init__(self):
+        self.columns = {name: [] for name in SNAPSHOT_COLUMNS}
+
+    def __len__(self) -> int:
+        return len(self.columns["date"])
+
+    def append(self, date, cash, position_value) -> None:
+        c = self.columns
+        c["date"].append(date)
+        c["cash"].append(cash)
+        c["position_value"].append(position_value)
+        c["total_value"].append(cash + position_value)
+
+    def extend_flat(self, dates, cash) -> None:
+        """Snapshots for idle dates: all cash, no positions."""
+        n = len(dates)
+        c = self.columns
+        c["date"].extend(dates)
+        c["cash"].extend([cash] * n)
+        c["position_value"].extend([0] * n)
+        c["total_value"].extend([cash + 0] * n)
+
+    def to_frame(self) -> pd.DataFrame:
+        port_df = _to_frame(self.columns, SNAPSHOT_COLUMNS)
+        if not port_df.empty:
+            port_df["daily_return"] = port_df["total_value"].pct_change().fillna(0)
+            port_df["cumulative_return"] = (1 + port_df["daily_return"]).cumprod() - 1
+        return port_df
+
+
+def _to_frame(columns: dict, spec: dict) -> pd.DataFrame:
+    if not columns[next(iter(spec))]:
+        return pd.DataFrame()
+    data = {}
+    for name, ndigits in spec.items():
+        values = columns[name]
+        if name in DATE_COLUMNS:
+            data[name] = pd.DatetimeIndex(values).strftime("%Y-%m-%d")
+        elif ndigits is not None:
+            data[name] = round_values(values, ndigits)
+        else:
+            data[name] = values
+    return pd.DataFrame(data)
+
+
+def round_values(values: list, ndigits: int) -> np.ndarray:
+    """
+    Vectorized [round(v, ndigits) for v in values], typed the way a DataFrame
+    built from those scalars would be.
+
+    NumPy scalars round in their own dtype (np.float32.__round__ is np.round),
+    so each scalar type is rounded as its own array. Python floats get
+    Python's correctly rounded result: np.round's scaled rint agrees except
+    within a few ulps of a half, and those rare values are redone with round().
+    """
+    types = {type(v) for v in values}
+    if types <= {int}:
+        return np.asarray(values, dtype=np.int64)
+    if len(types) == 1:
+        return _round_as(values, types.pop(), ndigits)
+
+    # Mixed scalar types (e.g. Python float cash before the first float32 fill)
+    kinds = [type(v) for v in values]
+    out = np.empty(len(values), dtype=np.float64)
+    for t in types:
+        idx = np.flatnonzero([k is t for k in kinds])
+        out[idx] = _round_as([values[i] for i in idx], t, ndigits)
+    return out
+
+
+def _round_as(values: list, kind: type, ndigits: int) -> np.ndarray:
+    if issubclass(kind, np.generic):
+        return np.round(np.asarray(values, dtype=kind), ndigits)
+    if kind is int:
+        return np.asarray(values, dtype=np.int64)
+    return _round_python(np.asarray(values, dtype=np.float64), ndigits)
+
+
+def _round_python(arr: np.ndarray, ndigits: int) -> np.ndarray:
+    """Python's round(float, ndigits) over a float64 array."""
+    scale = 10.0 ** ndigits
+    scaled = arr * scale
+    out = np.rint(scaled) / scale
+    near_half = np.abs(np.abs(scaled - np.floor(scaled)) - 0.5) <= 4 * np.abs(np.spacing(scaled))
+    for i in np.flatnonzero(near_half):
+        out[i] = round(float(arr[i]), ndigits)
+    return out
@@ -4,22 +4,30 @@ Entry point for running a backtest.
 Usage:
     python -m backtesting.run                  # uses default BacktestConfig
     python -m backtesting.run --N 30 --K 7    # override hyperparameters
+    python -m backtesting.run --checkpoint     # also save engine_state.pkl
+    python -m backtesting.run --resume RUN_ID # simulate only dates added since RUN_ID
 
 Outputs to results/{run_id}/: config.json, trades.csv, portfolio.csv, report.html
 """
 
 import argparse
+import contextlib
 import dataclasses
+import itertools
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
 
 import pandas as pd
 
 from backtesting.config import BacktestConfig
-from backtesting.data_loader import load_price_data
-from backtesting.engine import run_backtest
-from backtesting.signals import compute_os_scores
+from backtesting.data_loader import iter_scored_days, load_price_data, prune_universe
+from backtesting.engine import CHECKPOINT_ENGINES, EngineState, run_backtest_stream, run_engine
+from backtesting.frame_cache import frame_cache, loaded_key, scored_key
+from backtesting.price_cache import cached_price_data
+from backtesting.profiling import RunProfiler
+from backtesting.signal_cache import cached_os_scores
+from backtesting.signals import combine_scores, compute_os_scores
 from results.report import compute_metrics, save_report
 
 def _resolve_results_dir() -> Path:
@@ -38,10 +46,24 @@ def _resolve_results_dir() -> Path:
 
 
 RESULTS_DIR = _resolve_results_dir()
+STATE_FILE = "engine_state.pkl"
 
 
-def make_run_id() -> str:
-    return datetime.now().strftime("%Y%m%d_%H%M%S")
+def make_run_id(prefix: str = "") -> str:
+    """
+    Timestamped run id whose results folder is reserved on return.
+
+    The folder is created with mkdir(exist_ok=False), so concurrent processes
+    starting in the same second get distinct ids (suffixed _1, _2, ...).
+    """
+    base = prefix + datetime.now().strftime("%Y%m%d_%H%M%S")
+    for n in itertools.count():
+        run_id = base if n == 0 else f"{base}_{n}"
+        try:
+            (RESULTS_DIR / run_id).mkdir(parents=True)
+        except FileExistsError:
+            continue
+        return run_id
 
 
 def execute_run(config: BacktestConfig, progress_callback=None, status_callback=None) -> dict:
@@ -51,8 +73,17 @@ def execute_run(config: BacktestConfig, progress_callback=None, status_callback=
     progress_callback(i, n, date, n_positions, n_trades) — called each simulation day.
     status_callback(message, fraction) — called at each pipeline phase transition.
 
+    Wall time and peak memory of every stage and engine phase are saved under
+    "timings" in config.json.
+
     Returns config dict with metrics appended (same as config.json contents).
     """
+    if config.checkpoint and config.engine not in CHECKPOINT_ENGINES:
+        raise ValueError(
+            f"checkpoint=True works only with the reference and stream engines, not {config.engine!r}"
+        )
+    profiler = RunProfiler(trace_memory=config.profile_memory)
+
     def _status(msg: str, pct: float) -> None:
         print(f"[{config.run_id}] {msg}")
         if status_callback is not None:
@@ -65,19 +96,33 @@ def execute_run(config: BacktestConfig, progress_callback=None, status_callback=
     run_dir.mkdir(parents=True, exist_ok=True)
     config.output_dir = str(run_dir)
 
-    _status(f"Loading data from {config.data_path}...", 0.05)
-    df = load_price_data(config)
-
-    _status(f"Computing OS scores (N={config.N}, w1={config.w1}, w2={config.w2})...", 0.15)
-    df = compute_os_scores(df, config)
-
-    n_tickers = df["ticker"].nunique()
-    n_days = df["date"].nunique()
-    _status(f"Simulating {n_tickers} tickers over {n_days} trading days...", 0.25)
-    trades_df, portfolio_df = run_backtest(df, config, progress_callback=progress_callback)
+    state = EngineState(cash=config.initial_capital) if config.checkpoint else None
+    if config.engine == "stream":
+        # data_path is a date-sorted scored file (save_scored_by_date)
+        _status(f"Streaming scored days from {config.data_path}...", 0.15)
+        days = iter_scored_days(config.data_path, config.start_date, config.end_date)
+        with profiler.stage("simulate"):
+            trades_df, portfolio_df = run_backtest_stream(
+                days, config, progress_callback=progress_callback, state=state,
+                clock=profiler.engine_clock(),
+            )
+    else:
+        df = _scored_frame(config, profiler, _status)
+        n_tickers = df["ticker"].nunique()
+        n_days = df["date"].nunique()
+        _status(f"Simulating {n_tickers} tickers over {n_days} trading days...", 0.25)
+        with profiler.stage("simulate"):
+            trades_df, portfolio_df = run_engine(
+                df, config, progress_callback=progress_callback, state=state,
+                clock=profiler.engine_clock(),
+            )
+    if state is not None:
+        with profiler.stage("checkpoint"):
+            state.save(run_dir / STATE_FILE)
 
     _status("Computing performance metrics...", 0.90)
-    metrics = compute_metrics(portfolio_df, trades_df)
+    with profiler.stage("metrics"):
+        metrics = compute_metrics(portfolio_df, trades_df)
     print(
         f"[{config.run_id}] Done. "
         f"Trades: {metrics['n_trades']}, "
@@ -86,27 +131,159 @@ def execute_run(config: BacktestConfig, progress_callback=None, status_callback=
         f"MaxDD: {metrics['max_drawdown_pct']:.2f}%"
     )
 
-    _status("Saving trades and portfolio CSV files...", 0.93)
-    trades_df.to_csv(run_dir / "trades.csv", index=False)
-    portfolio_df.to_csv(run_dir / "portfolio.csv", index=False)
+    return save_outputs(config, trades_df, portfolio_df, metrics, status=_status, profiler=profiler)
+
+
+def _scored_frame(config: BacktestConfig, profiler: RunProfiler, status) -> pd.DataFrame:
+    """Load, prune and score config's data; through the process's frame cache if config.frame_cache."""
+    cache = frame_cache(config) if config.frame_cache else None
+    if cache is not None:
+        df = cache.get(scored_key(config))
+        if df is not None:
+            df["os_score"] = combine_scores(df, config)  # w1 / w2 may differ from the cached run
+            status(f"Reusing scored data (N={config.N}) from memory; frame cache {cache.stats()}", 0.15)
+            return df
+
+    status(f"Loading data from {config.data_path}...", 0.05)
+    with profiler.stage("load"):
+        df = cache.get(loaded_key(config)) if cache is not None else None
+        if df is None:
+            df = cached_price_data(config) if config.price_cache else load_price_data(config)
+            if cache is not None:
+                cache.put(loaded_key(config), df)
+    if config.prune_universe:
+        with profiler.stage("prune"):
+            n_before = df["ticker"].nunique()
+            df = prune_universe(df, config)
+        status(f"Pruned universe: {df['ticker'].nunique()} of {n_before} tickers can be entered", 0.10)
+
+    status(f"Computing OS scores (N={config.N}, w1={config.w1}, w2={config.w2})...", 0.15)
+    with profiler.stage("signals"):
+        df = cached_os_scores(df, config) if config.signal_cache else compute_os_scores(df, config)
+    if cache is not None:
+        cache.put(scored_key(config), df)
+    return df
 
-    # Save config.json (flat dataclasses.asdict + metrics)
+
+def resume_run(
+    run_id: str,
+    end_date: "str | None" = None,
+    progress_callback=None,
+    status_callback=None,
+) -> dict:
+    """
+    Append-new-days mode: continue a run saved with checkpoint=True.
+
+    Loads the run's config.json and engine_state.pkl, reads only a signal
+    warm-up window before the last simulated date, simulates the dates after
+    it (through end_date, default: all available data) and rewrites the run's
+    outputs and checkpoint in place. Scores on the warm-up window equal the
+    full-history scores up to float rounding.
+
+    Returns config dict with metrics appended (same as config.json contents).
+    """
+    run_dir = RESULTS_DIR / run_id
+    with open(run_dir / "config.json") as f:
+        saved = json.load(f)
+    fields = {f.name for f in dataclasses.fields(BacktestConfig)}
+    config = BacktestConfig(**{k: v for k, v in saved.items() if k in fields})
+    config.end_date = end_date
+    config.output_dir = str(run_dir)
+    state = EngineState.load(run_dir / STATE_FILE)
+    profiler = RunProfiler(trace_memory=config.profile_memory)
+
+    def _status(msg: str, pct: float) -> None:
+        print(f"[{config.run_id}] {msg}")
+        if status_callback is not None:
+            status_callback(msg, pct)
+
+    last = pd.Timestamp(state.last_date)
+    if config.engine == "stream":
+        _status(f"Resuming after {last.date()}: streaming {config.data_path}...", 0.05)
+        days = iter_scored_days(config.data_path, last.strftime("%Y-%m-%d"), end_date)
+        with profiler.stage("simulate"):
+            trades_df, portfolio_df = run_backtest_stream(
+                days, config, progress_callback=progress_callback, state=state,
+                clock=profiler.engine_clock(),
+            )
+    else:
+        warmup_start = last - timedelta(days=2 * (config.N + 1) + 14)
+        if config.start_date:
+            warmup_start = max(warmup_start, pd.Timestamp(config.start_date))
+        load_config = dataclasses.replace(config, start_date=warmup_start.strftime("%Y-%m-%d"))
+
+        _status(f"Resuming after {last.date()}: loading from {load_config.start_date}...", 0.05)
+        with profiler.stage("load"):
+            df = cached_price_data(load_config) if config.price_cache else load_price_data(load_config)
+        if config.prune_universe:
+            with profiler.stage("prune"):
+                df = prune_universe(df, config, keep=[p.ticker for p in state.positions])
+        with profiler.stage("signals"):
+            df = compute_os_scores(df, config)
+
+        n_new = df.loc[df["date"] > last, "date"].nunique()
+        _status(f"Simulating {n_new} new trading days...", 0.25)
+        with profiler.stage("simulate"):
+            trades_df, portfolio_df = run_engine(
+                df, config, progress_callback=progress_callback, state=state,
+                clock=profiler.engine_clock(),
+            )
+
+    with profiler.stage("checkpoint"):
+        state.save(run_dir / STATE_FILE)
+    with profiler.stage("metrics"):
+        metrics = compute_metrics(portfolio_df, trades_df)
+    return save_outputs(config, trades_df, portfolio_df, metrics, status=_status, profiler=profiler)
+
+
+def save_outputs(
+    config: BacktestConfig,
+    trades_df: pd.DataFrame,
+    portfolio_df: pd.DataFrame,
+    metrics: dict,
+    status=None,
+    profiler: "RunProfiler | None" = None,
+) -> dict:
+    """
+    Write trades.csv, portfolio.csv, report.html and config.json to config.output_dir.
+
+    status(message, fraction) — optional phase-transition callback.
+    profiler — if given, its timings (including these writes) go under
+    "timings" in config.json, which is written last for that reason.
+    Returns config dict with metrics appended (same as config.json contents).
+    """
+    stage = profiler.stage if profiler is not None else (lambda name: contextlib.nullcontext())
+    run_dir = Path(config.output_dir)
+    run_dir.mkdir(parents=True, exist_ok=True)
+
+    if status is not None:
+        status("Saving trades and portfolio CSV files...", 0.93)
+    with stage("write_csv"):
+        trades_df.to_csv(run_dir / "trades.csv", index=False)
+        portfolio_df.to_csv(run_dir / "portfolio.csv", index=False)
+
+    # config.json contents: flat dataclasses.asdict + metrics (+ timings)
     config_dict = dataclasses.asdict(config)
     config_dict["metrics"] = metrics
-    with open(run_dir / "config.json", "w") as f:
-        json.dump(config_dict, f, indent=2)
 
-    _status("Generating HTML report...", 0.96)
-    save_report(
-        run_id=config.run_id,
-        config_dict=config_dict,
-        metrics=metrics,
-        trades_df=trades_df,
-        portfolio_df=portfolio_df,
-        output_dir=run_dir,
-    )
+    if status is not None:
+        status("Generating HTML report...", 0.96)
+    with stage("report"):
+        save_report(
+            run_id=config.run_id,
+            config_dict=config_dict,
+            metrics=metrics,
+            trades_df=trades_df,
+            portfolio_df=portfolio_df,
+            output_dir=run_dir,
+        )
     print(f"[{config.run_id}] Report: {run_dir / 'report.html'}")
 
+    if profiler is not None:
+        config_dict["timings"] = profiler.as_dict()
+    with open(run_dir / "config.json", "w") as f:
+        json.dump(config_dict, f, indent=2)
+
     return config_dict
 
 
@@ -119,18 +296,51 @@ def main() -> None:
     parser.add_argument("--stop_loss_rate", type=float, default=0.03, help="Stop-loss rate")
     parser.add_argument("--K", type=int, default=5, help="Max hold days (default: 5)")
     parser.add_argument("--V", type=int, default=500_000, help="Min volume filter")
+    parser.add_argument("--signal_kernel", choices=["pandas", "cumsum"], default="pandas",
+                        help="Z-score implementation (default: pandas); 'cumsum' is vectorized, "
+                             "equal within float32 rounding")
+    parser.add_argument("--signal_workers", type=int, default=1,
+                        help="Score ticker blocks in parallel with this many workers (default: 1)")
+    parser.add_argument("--signal_cache", action="store_true",
+                        help="Reuse r / D_r / D_v cached next to --data_path for the same data, dates and N")
+    parser.add_argument("--prune_universe", action="store_true",
+                        help="Drop tickers that never pass --V / min_price before scoring (same results, less work)")
     parser.add_argument("--data_path", type=str, default="data/v1/prices.csv")
+    parser.add_argument("--price_cache", action="store_true",
+                        help="Memory-map the loaded frame cached next to --data_path for the same data and dates")
+    parser.add_argument("--engine", choices=["reference", "dense", "stream"], default="reference",
+                        help="Simulation engine (default: reference); 'stream' reads a "
+                             "date-sorted scored parquet from --data_path")
+    parser.add_argument("--checkpoint", action="store_true",
+                        help="Save engine state so the run can later be resumed with --resume "
+                             "(reference and stream engines)")
+    parser.add_argument("--profile_memory", action="store_true",
+                        help="Trace peak allocations per stage in config.json timings (slower)")
+    parser.add_argument("--resume", type=str, default=None, metavar="RUN_ID",
+                        help="Simulate only dates added since checkpointed run RUN_ID")
     args = parser.parse_args()
 
+    if args.resume:
+        resume_run(args.resume)
+        return
+
     config = BacktestConfig(
         N=args.N,
         w1=args.w1,
         w2=args.w2,
+        signal_kernel=args.signal_kernel,
+        signal_workers=args.signal_workers,
+        signal_cache=args.signal_cache,
         win_take_rate=args.win_take_rate,
         stop_loss_rate=args.stop_loss_rate,
         K=args.K,
         V=args.V,
+        prune_universe=args.prune_universe,
         data_path=args.data_path,
+        price_cache=args.price_cache,
+        engine=args.engine,
+        checkpoint=args.checkpoint,
+        profile_memory=args.profile_memory,
     )
     execute_run(config)
 
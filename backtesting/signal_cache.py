@@ -0,0 +1,157 @@
+"""
+Persistent cache of the rolling-window signal columns.
+
+r, D_r and D_v depend only on the price data, the date range, N and the
+signal kernel; os_score = w1 * D_r + w2 * D_v is rebuilt from them for any
+weights, so changing w1/w2 never reruns the rolling windows.
+
+    df = load_price_data(config)
+    df = cached_os_scores(df, config)    # same frame as compute_os_scores(df, config)
+
+Entries are parquet files in a .signal_cache folder next to the dataset,
+named by a hash of (data fingerprint, start_date, end_date, N,
+signal_kernel, and V / min_price with prune_universe). The fingerprint is the path, size and mtime of the data
+file (of every file under it for a directory), so rewriting the data
+invalidates its entries. The folder is bounded by signal_cache_mb: after
+each write the least recently used entries (file mtime, refreshed on every
+hit) are deleted.
+"""
+
+import hashlib
+import json
+import os
+import uuid
+from pathlib import Path
+
+import pandas as pd
+
+from backtesting.config import BacktestConfig
+from backtesting.signals import combine_scores, compute_os_scores, sort_by_ticker_date
+
+CACHE_DIRNAME = ".signal_cache"
+# Columns stored per entry, in compute_os_scores row order (ticker, date)
+CACHED_COLUMNS = ("r", "D_r", "D_v")
+
+
+class SignalCache:
+    """A folder of cached signal columns; see the module docstring."""
+
+    def __init__(self, root, max_bytes: int = 1024 * 2**20):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+
+    @classmethod
+    def for_config(cls, config: BacktestConfig) -> "SignalCache":
+        """The cache next to config.data_path, bounded by config.signal_cache_mb."""
+        return cls(Path(config.data_path).parent / CACHE_DIRNAME, config.signal_cache_mb * 2**20)
+
+    def key(self, config: BacktestConfig) -> str:
+        parts = {
+            "data": data_fingerprint(config.data_path),
+            "start_date": config.start_date,
+            "end_date": config.end_date,
+            "N": config.N,
+            "signal_kernel": config.signal_kernel,
+        }
+        if config.prune_universe:  # a pruned frame has other rows
+            parts["prune"] = [config.V, config.min_price]
+        return hashlib.sha1(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+    def get(self, key: str, n_rows: int) -> "pd.DataFrame | None":
+        """Cached columns for key, or None if absent or not n_rows long."""
+        path = self._path(key)
+        try:
+            cols = pd.read_parquet(path, columns=list(CACHED_COLUMNS))
+        except (OSError, ValueError):  # absent or unreadable
+            return None
+        if len(cols) != n_rows:
+            return None
+        os.utime(path)  # LRU stamp
+        return cols
+
+    def put(self, key: str, scored: pd.DataFrame) -> None:
+        """Store the signal columns of a scored frame, then evict down to max_bytes."""
+        path = self._path(key)
+        tmp = temp_path(path)
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            scored[list(CACHED_COLUMNS)].to_parquet(tmp, index=False)
+            os.replace(tmp, path)
+        except OSError:  # read-only data folder: run uncached
+            tmp.unlink(missing_ok=True)
+            return
+        self.evict(keep=path)
+
+    def evict(self, keep: "Path | None" = None) -> None:
+        """Delete least recently used entries until the folder fits in max_bytes."""
+        evict_lru(self.root, "*.parquet", self.max_bytes, keep=keep)
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}.parquet"
+
+
+def evict_lru(root: Path, pattern: str, max_bytes: int, keep: "Path | None" = None) -> None:
+    """Delete the oldest-mtime files matching pattern in root until they total at most max_bytes."""
+    entries = []
+    for p in root.glob(pattern):
+        try:
+            st = p.stat()
+        except FileNotFoundError:  # removed by a concurrent run
+            continue
+        entries.append((st.st_mtime, st.st_size, p))
+    total = sum(size for _, size, _ in entries)
+    for _, size, p in sorted(entries, key=lambda e: e[0]):
+        if total <= max_bytes:
+            break
+        if p == keep:
+            continue
+        p.unlink(missing_ok=True)
+        total -= size
+
+
+def temp_path(path: Path) -> Path:
+    """
+    A temporary name next to path, unique to this writer (pid and a random
+    suffix), to write to before os.replace: concurrent runs storing the same
+    entry never write into one another's file. Eviction globs never match it.
+    """
+    return path.with_name(f"{path.name}.{os.getpid()}.{uuid.uuid4().hex}.tmp")
+
+
+def data_fingerprint(data_path) -> list:
+    """[path, [name, size, mtime_ns], ...] for a data file, or for every file under a directory."""
+    path = Path(data_path).resolve()
+    files = sorted(p for p in path.rglob("*") if p.is_file()) if path.is_dir() else [path]
+    fingerprint = [str(path)]
+    for p in files:
+        st = p.stat()
+        fingerprint.append([str(p.relative_to(path)) if path.is_dir() else p.name, st.st_size, st.st_mtime_ns])
+    return fingerprint
+
+
+def cached_os_scores(
+    df: pd.DataFrame,
+    config: BacktestConfig,
+    cache: "SignalCache | None" = None,
+) -> pd.DataFrame:
+    """
+    compute_os_scores(df, config) through the signal cache.
+
+    df must be load_price_data(config): the key describes config.data_path
+    and its date range, not the frame itself.
+    """
+    if cache is None:
+        cache = SignalCache.for_config(config)
+    df = sort_by_ticker_date(df)
+    key = cache.key(config)
+
+    cols = cache.get(key, len(df))
+    if cols is None:
+        scored = compute_os_scores(df, config)
+        cache.put(key, scored)
+        return scored
+
+    for col in CACHED_COLUMNS:
+        df[col] = cols[col].to_numpy()
+    df["os_score"] = combine_scores(df, config)
+    return df
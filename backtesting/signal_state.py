@@ -0,0 +1,144 @@
+"""
+Incremental OS scores: score one new trading day from a persisted per-ticker
+rolling state instead of rescoring the whole history.
+
+    state = SignalState.from_scored(compute_os_scores(history_df, config), config)
+    state.save("signal_state.pkl")
+    ...
+    state = SignalState.load("signal_state.pkl")
+    day = update_os_scores(state, new_day_df)    # r, D_r, D_v, os_score of that day
+    state.save("signal_state.pkl")
+
+The state keeps, per ticker, the last close and ring buffers of its last N
+|r| and volume values. An update costs O(tickers x N) array operations,
+a few milliseconds for a full universe.
+
+Scores follow compute_os_scores: rows are counted per ticker (days a ticker
+does not trade do not advance its windows), a window needs N non-NaN values,
+and windows of N equal values give NaN. Mean and std are recomputed from the
+N buffered values in float64, so scores equal the full-history ones up to
+float32 rounding (~1 ulp), like the "cumsum" kernel.
+"""
+
+import dataclasses
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from backtesting.config import BacktestConfig
+from backtesting.signals import combine_scores
+
+
+@dataclasses.dataclass
+class SignalState:
+    """Per-ticker rolling-window state; row i of every array is tickers[i]."""
+    config: BacktestConfig              # N, w1, w2 of the scores
+    tickers: pd.Index
+    last_close: np.ndarray              # (T,) close of each ticker's latest row
+    abs_r: np.ndarray                   # (T, N) float32 ring buffer of |r|, NaN until filled
+    volume: np.ndarray                  # (T, N) float64 ring buffer of volume
+    n_rows: np.ndarray                  # (T,) rows seen per ticker; next ring slot is n_rows % N
+    last_date: "pd.Timestamp | None" = None
+
+    @classmethod
+    def from_scored(cls, df: pd.DataFrame, config: BacktestConfig) -> "SignalState":
+        """State after the last date of a scored frame (output of compute_os_scores)."""
+        N = config.N
+        df = df.sort_values(["ticker", "date"])
+        tickers = pd.Index(df["ticker"].astype(object).unique())
+        ticker_idx = tickers.get_indexer(df["ticker"].astype(object))
+        row = df.groupby("ticker", observed=True).cumcount().to_numpy()
+        n_rows = np.bincount(ticker_idx, minlength=len(tickers)).astype(np.int64)
+
+        state = cls(
+            config=config,
+            tickers=tickers,
+            last_close=np.full(len(tickers), np.nan, dtype=df["close"].dtype),
+            abs_r=np.full((len(tickers), N), np.nan, dtype=np.float32),
+            volume=np.full((len(tickers), N), np.nan),
+            n_rows=n_rows,
+            last_date=df["date"].max() if len(df) else None,
+        )
+        tail = row >= n_rows[ticker_idx] - N
+        i, slot = ticker_idx[tail], row[tail] % N
+        state.abs_r[i, slot] = np.abs(df["r"].to_numpy()[tail])
+        state.volume[i, slot] = df["volume"].to_numpy()[tail]
+        last = row == n_rows[ticker_idx] - 1
+        state.last_close[ticker_idx[last]] = df["close"].to_numpy()[last]
+        return state
+
+    def save(self, path) -> None:
+        with open(path, "wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path) -> "SignalState":
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    def _add_tickers(self, new: pd.Index) -> None:
+        n, N = len(new), self.config.N
+        self.tickers = self.tickers.append(new)
+        self.last_close = np.concatenate([self.last_close, np.full(n, np.nan, dtype=self.last_close.dtype)])
+        self.abs_r = np.concatenate([self.abs_r, np.full((n, N), np.nan, dtype=np.float32)])
+        self.volume = np.concatenate([self.volume, np.full((n, N), np.nan)])
+        self.n_rows = np.concatenate([self.n_rows, np.zeros(n, dtype=np.int64)])
+
+
+def update_os_scores(state: SignalState, day_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Score one new trading day and advance state in place.
+
+    day_df holds one row per ticker for a single date after state.last_date
+    (at least ticker, date, close, volume). Tickers not seen before start new
+    windows (r is NaN on their first row). Returns a copy of day_df with r,
+    D_r, D_v and os_score columns, in the same dtypes as compute_os_scores.
+    """
+    dates = day_df["date"].unique()
+    if len(dates) != 1:
+        raise ValueError(f"update_os_scores expects one date, got {len(dates)}")
+    date = pd.Timestamp(dates[0])
+    if state.last_date is not None and date <= state.last_date:
+        raise ValueError(f"{date.date()} is not after the state's last date {state.last_date.date()}")
+    names = day_df["ticker"].astype(object)
+    if names.duplicated().any():
+        raise ValueError(f"Duplicate tickers on {date.date()}")
+
+    idx = state.tickers.get_indexer(names)
+    if (idx < 0).any():
+        state._add_tickers(pd.Index(names[idx < 0]))
+        idx = state.tickers.get_indexer(names)
+
+    N = state.config.N
+    close = day_df["close"].to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = (close / state.last_close[idx] - 1).astype("float32")
+
+    slot = state.n_rows[idx] % N
+    state.abs_r[idx, slot] = np.abs(r)
+    state.volume[idx, slot] = day_df["volume"].to_numpy()
+    state.n_rows[idx] += 1
+    state.last_close[idx] = close
+    state.last_date = date
+
+    scores = pd.DataFrame({
+        "r": r,
+        "D_r": (np.sign(r) * _window_zscore(state.abs_r[idx], np.abs(r))).astype("float32"),
+        "D_v": _window_zscore(state.volume[idx], day_df["volume"].to_numpy()).astype("float32"),
+    }, index=day_df.index)
+    scores["os_score"] = combine_scores(scores, state.config)
+    # One concat: inserting columns one by one dominates the latency on a day-sized frame
+    return pd.concat([day_df, scores], axis=1)
+
+
+def _window_zscore(window: np.ndarray, current: np.ndarray) -> np.ndarray:
+    """(current - mean) / std (ddof=1) per row of a (k, N) window; NaN if incomplete or constant."""
+    window = window.astype(np.float64)
+    k, N = window.shape
+    if N < 2:  # rolling(1).std() is NaN (ddof=1)
+        return np.full(k, np.nan)
+    undefined = np.isnan(window).any(axis=1) | (window == window[:, :1]).all(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = (current - window.mean(axis=1)) / window.std(axis=1, ddof=1)
+    return np.where(undefined, np.nan, z)
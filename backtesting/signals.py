@@ -1,7 +1,18 @@
+import multiprocessing as mp
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
 import numpy as np
 import pandas as pd
 
 from backtesting.config import BacktestConfig
+from backtesting.data_loader import with_range_index
+
+SIGNAL_KERNELS = ("pandas", "cumsum")
+# Rows per worker below which signal_workers is capped: starting and feeding a
+# worker costs more than scoring fewer rows saves (all rows -> serial path)
+SHARD_MIN_ROWS = 1_000_000
 
 
 def compute_os_scores(df: pd.DataFrame, config: BacktestConfig) -> pd.DataFrame:
@@ -17,12 +28,35 @@ def compute_os_scores(df: pd.DataFrame, config: BacktestConfig) -> pd.DataFrame:
     First N rows per ticker have NaN os_score (excluded by engine).
     Division by zero (std=0) produces NaN (stock safely excluded).
     Intermediate series are cast to float32 to limit peak RAM usage.
+
+    config.signal_kernel selects how r, D_r and D_v are computed: "pandas"
+    (groupby + rolling, the reference) or "cumsum" (windowed sums from one
+    whole-array cumsum, see _RunningSums; ~1 float32 ulp from pandas).
+    config.signal_workers > 1 scores contiguous ticker blocks in parallel
+    (_sharded_columns), with at most one worker per SHARD_MIN_ROWS rows.
     """
-    N, w1, w2 = config.N, config.w1, config.w2
-    df = df.sort_values(["ticker", "date"]).reset_index(drop=True)
+    if config.signal_kernel not in SIGNAL_KERNELS:
+        raise ValueError(f"Unknown signal_kernel {config.signal_kernel!r}; expected one of {SIGNAL_KERNELS}")
+    df = sort_by_ticker_date(df)
+
+    workers = min(config.signal_workers, len(df) // SHARD_MIN_ROWS)
+    if workers > 1 and df["ticker"].nunique() > 1:
+        df["r"], df["D_r"], df["D_v"] = _sharded_columns(df, config, workers)
+    else:
+        df["r"], df["D_r"], df["D_v"] = _score_columns(df, config)
+    df["os_score"] = combine_scores(df, config)
+    return df
+
+
+def _score_columns(df: pd.DataFrame, config: BacktestConfig) -> tuple:
+    """r, D_r, D_v (float32 arrays) of a (ticker, date)-sorted frame with ticker, close, volume."""
+    N = config.N
+    if config.signal_kernel == "cumsum":
+        r, blocks = _signal_blocks(df, [N])
+        return r, blocks[N][:, 0], blocks[N][:, 1]
 
     # Step 1: daily return per ticker (first row per ticker = NaN)
-    df["r"] = (
+    r = (
         df.groupby("ticker", observed=True)["close"]
         .pct_change()
         .astype("float32")
@@ -35,15 +69,271 @@ def compute_os_scores(df: pd.DataFrame, config: BacktestConfig) -> pd.DataFrame:
             "float32"
         )
 
-    df["D_r"] = df.groupby("ticker", observed=True)["r"].transform(_d_r)
+    d_r = r.groupby(df["ticker"], observed=True).transform(_d_r)
 
     # Step 3: volume z-score (float32 to save RAM)
     def _d_v(x: pd.Series) -> pd.Series:
         return ((x - x.rolling(N).mean()) / x.rolling(N).std()).astype("float32")
 
-    df["D_v"] = df.groupby("ticker", observed=True)["volume"].transform(_d_v)
+    d_v = df.groupby("ticker", observed=True)["volume"].transform(_d_v)
+    return r.to_numpy(), d_r.to_numpy(), d_v.to_numpy()
+
+
+def _sharded_columns(df: pd.DataFrame, config: BacktestConfig, workers: int) -> tuple:
+    """
+    _score_columns over contiguous ticker blocks on `workers` workers.
+
+    Tickers are independent, so pandas blocks equal one pass exactly and
+    cumsum blocks up to the last float32 bit (bitwise on a 4M-row frame). The cumsum kernel runs in threads (NumPy releases
+    the GIL); the pandas kernel calls Python per ticker, so it runs in the
+    process pool of _process_pool, kept for later calls. Each block is sent
+    as three arrays (ticker codes, close, volume), not as a frame. Results
+    are written into preallocated columns, never concatenated.
+    """
+    codes = _segment_codes(df["ticker"])
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    n = len(df)
+    # Cut at the ticker boundary nearest each equal-rows split; 2 blocks per worker
+    idx = np.searchsorted(starts, np.linspace(0, n, 2 * workers + 1)[1:-1])
+    cuts = np.unique(np.r_[0, np.append(starts, n)[idx], n])
+
+    columns = tuple(np.empty(n, dtype=np.float32) for _ in range(3))
+    close = df["close"].to_numpy()
+    volume = df["volume"].to_numpy()
+    threads = config.signal_kernel == "cumsum"
+    pool = ThreadPoolExecutor(max_workers=workers) if threads else _process_pool(workers)
+    try:
+        futures = {
+            pool.submit(_score_block, codes[a:b], close[a:b], volume[a:b], config): (a, b)
+            for a, b in zip(cuts[:-1], cuts[1:])
+        }
+        for future in as_completed(futures):
+            a, b = futures[future]
+            for out, values in zip(columns, future.result()):
+                out[a:b] = values
+    except BrokenProcessPool:
+        _shutdown_process_pool()  # a worker died: start a fresh pool next call
+        raise
+    finally:
+        if threads:
+            pool.shutdown()
+    return columns
+
+
+def _score_block(codes: np.ndarray, close: np.ndarray, volume: np.ndarray, config: BacktestConfig) -> tuple:
+    """_score_columns of one block given as arrays; integer codes group like the tickers."""
+    return _score_columns(pd.DataFrame({"ticker": codes, "close": close, "volume": volume}), config)
+
+
+# Process pool of the pandas kernel, reused across compute_os_scores calls
+_POOL: "ProcessPoolExecutor | None" = None
+_POOL_WORKERS = 0
+_POOL_LOCK = threading.Lock()
+
+
+def _process_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    The shared process pool, (re)started with `workers` processes.
+
+    Workers start from a fork server (spawn where there is none), not by
+    forking the caller, which may hold Arrow's reader threads. Like any
+    non-fork pool this needs the calling script's entry point under
+    `if __name__ == "__main__":`. Each worker imports pandas once, on the
+    first call that uses the pool.
+    """
+    global _POOL, _POOL_WORKERS
+    with _POOL_LOCK:
+        if _POOL is None or _POOL_WORKERS != workers:
+            if _POOL is not None:
+                _POOL.shutdown()
+            method = "forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn"
+            _POOL = ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context(method))
+            _POOL_WORKERS = workers
+        return _POOL
+
+
+def _shutdown_process_pool() -> None:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.shutdown(wait=False, cancel_futures=True)
+            _POOL = None
+
+
+def sort_by_ticker_date(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    df sorted by (ticker, date) with a fresh RangeIndex.
+
+    A frame with a categorical ticker that is already in that order (as
+    load_price_data returns it) is not copied, so columns memory-mapped from
+    the price cache stay shared.
+    """
+    ticker = df["ticker"]
+    if isinstance(ticker.dtype, pd.CategoricalDtype) and len(df) > 1:
+        codes = ticker.cat.codes.to_numpy()
+        dates = df["date"].to_numpy()
+        # Same test as the stable sort: equal keys keep their order
+        in_order = (codes[1:] > codes[:-1]) | ((codes[1:] == codes[:-1]) & (dates[1:] >= dates[:-1]))
+        if codes[0] >= 0 and in_order.all():
+            return with_range_index(df)
+    return df.sort_values(["ticker", "date"]).reset_index(drop=True)
+
+
+def combine_scores(df: pd.DataFrame, config: BacktestConfig) -> pd.Series:
+    """os_score = w1 * D_r + w2 * D_v (float32) from a frame that has D_r and D_v."""
+    return (config.w1 * df["D_r"] + config.w2 * df["D_v"]).astype("float32")
 
-    # Step 4: combined OS score
-    df["os_score"] = (w1 * df["D_r"] + w2 * df["D_v"]).astype("float32")
 
+def compute_signal_windows(df: pd.DataFrame, windows) -> tuple[pd.DataFrame, dict]:
+    """
+    D_r and D_v for several rolling windows in one pass (the "cumsum" kernel).
+
+    Returns, the daily return and the running sums of |r| and volume being
+    shared by every window:
+      base   — df sorted by (ticker, date) with the r column
+      blocks — {N: float32 array (rows, 2) of D_r, D_v in base row order}
+
+    apply_signal_window(base, blocks[N], config) gives the scored frame of
+    one window, equal to compute_os_scores with N and signal_kernel="cumsum".
+    """
+    base = sort_by_ticker_date(df)
+    base["r"], blocks = _signal_blocks(base, windows)
+    return base, blocks
+
+
+def apply_signal_window(base: pd.DataFrame, block: np.ndarray, config: BacktestConfig) -> pd.DataFrame:
+    """Scored frame of one compute_signal_windows block, os_score from config.w1 / w2."""
+    df = base.assign(D_r=block[:, 0], D_v=block[:, 1])
+    df["os_score"] = combine_scores(df, config)
     return df
+
+
+def _signal_blocks(df: pd.DataFrame, windows) -> tuple[np.ndarray, dict]:
+    """r (float32) of a (ticker, date)-sorted frame and the D_r / D_v block of every window."""
+    codes = _segment_codes(df["ticker"])
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if len(codes) else np.empty(0, dtype=np.intp)
+
+    close = df["close"].to_numpy()
+    r = np.empty(len(close), dtype=close.dtype)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r[1:] = close[1:] / close[:-1] - 1
+    r[starts] = np.nan
+    r = r.astype("float32")
+
+    sign = np.sign(r)
+    abs_r = _RunningSums(np.abs(r), starts)
+    volume = _RunningSums(df["volume"].to_numpy(), starts)
+    blocks = {}
+    for N in dict.fromkeys(windows):
+        block = np.empty((len(df), 2), dtype=np.float32)
+        block[:, 0] = sign * abs_r.zscore(N)
+        block[:, 1] = volume.zscore(N)
+        blocks[N] = block
+    return r, blocks
+
+
+def _segment_codes(tickers: pd.Series) -> np.ndarray:
+    if isinstance(tickers.dtype, pd.CategoricalDtype):
+        return tickers.cat.codes.to_numpy()
+    return pd.factorize(tickers)[0]
+
+
+class _RunningSums:
+    """
+    Running sums of one column over ticker segments (contiguous rows), from
+    which the rolling z-score of any window length is a few array ops.
+
+    Rolling sums over N rows are differences of float64 running sums (of
+    values, squares and valid-value counts); a window is used only when it
+    lies inside one segment and holds N non-NaN values, as rolling(N)
+    requires. The z-score does not depend on location or scale, so each
+    segment is first centred on its mean and divided by its std; the sums
+    are one whole-array cumsum of that y and of y**2 - 1, both of mean 0 in
+    every segment, so the running totals stay small and a 1e3-volume name
+    next to 1e9-volume names is as exact as alone.
+
+    Windows whose N values are all equal get NaN, as pandas gives std=0 there.
+    Otherwise results differ from groupby + rolling only by float64 rounding
+    (rolling uses online updates): ~1 float32 ulp after the cast, on
+    universes mixing 1e3- and 1e8-volume tickers too.
+    """
+    __slots__ = ("n", "y", "seg_start", "s1", "s2", "e1", "e2", "count", "run")
+
+    def __init__(self, values: np.ndarray, starts: np.ndarray):
+        n = self.n = len(values)
+        if n == 0:
+            return
+        x = values.astype(np.float64)
+        valid = ~np.isnan(x)
+        lengths = np.diff(np.r_[starts, n])
+        self.seg_start = np.repeat(starts, lengths)
+
+        # Standardize by the segment mean / std of the valid values
+        filled = np.where(valid, x, 0.0)
+        counts = np.maximum(np.add.reduceat(valid.astype(np.int64), starts), 1)
+        offset = np.add.reduceat(filled, starts) / counts
+        centred = np.where(valid, x - np.repeat(offset, lengths), 0.0)
+        scale = np.sqrt(np.add.reduceat(centred * centred, starts) / counts)
+        scale[scale == 0] = 1.0
+        self.y = centred / np.repeat(scale, lengths)
+
+        # Inclusive (s) and exclusive (e) per-segment running sums: the sum
+        # over rows a..i of one segment is s[i] - e[a]. The valid y**2 of a
+        # segment average exactly 1, so y**2 - 1 is summed (no drift; a full
+        # window of N values gets N back in zscore)
+        y2 = np.where(valid, self.y * self.y - 1.0, 0.0)
+        self.s1 = _segment_cumsum(self.y, starts)
+        self.s2 = _segment_cumsum(y2, starts)
+        self.e1, self.e2 = self.s1 - self.y, self.s2 - y2
+        self.e1[starts] = self.e2[starts] = 0.0
+        self.count = _prefix_sum(valid.astype(np.int64))
+
+        # Runs of equal consecutive values within a segment: a run of N is a constant window
+        same = np.zeros(n, dtype=bool)
+        same[1:] = x[1:] == x[:-1]
+        same[starts] = False
+        idx = np.arange(n)
+        self.run = idx - np.maximum.accumulate(np.where(same, 0, idx)) + 1
+
+    def zscore(self, N: int) -> np.ndarray:
+        """(x - rolling_mean(x, N)) / rolling_std(x, N); float64, NaN where undefined."""
+        n = self.n
+        out = np.full(n, np.nan)
+        if n == 0 or N < 2 or N > n:  # rolling(1).std() is NaN (ddof=1)
+            return out
+
+        rows = np.arange(N - 1, n)
+        full = (
+            (rows - N + 1 >= self.seg_start[N - 1:])
+            & (self.count[N:] - self.count[:-N] == N)
+            & (self.run[N - 1:] < N)
+        )
+        s1 = self.s1[N - 1:] - self.e1[:n - N + 1]
+        s2 = self.s2[N - 1:] - self.e2[:n - N + 1] + N
+        mean = s1 / N
+        var = np.maximum((s2 - s1 * mean) / (N - 1), 0.0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            z = (self.y[N - 1:] - mean) / np.sqrt(var)
+        out[N - 1:] = np.where(full, z, np.nan)
+        return out
+
+
+def _segment_cumsum(a: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """
+    Running sum of a that restarts at every segment start: one cumsum over
+    the whole array, minus its value just before each segment. a (y, or
+    y**2 - 1) has mean 0 in every segment, so the whole-array sums are a
+    random walk that stays small, and the subtraction loses nothing that
+    survives the float32 cast.
+    """
+    total = np.cumsum(a)
+    before = total[starts] - a[starts]
+    return total - np.repeat(before, np.diff(np.r_[starts, len(a)]))
+
+
+def _prefix_sum(a: np.ndarray) -> np.ndarray:
+    """[0, a0, a0+a1, ...] (length n + 1)."""
+    c = np.empty(len(a) + 1, dtype=a.dtype)
+    c[0] = 0
+    np.cumsum(a, out=c[1:])
+    return c
@@ -0,0 +1,344 @@
+"""
+Grid sweep over exit, sizing and universe-filter hyperparameters.
+
+Usage:
+    python -m backtesting.sweep --win_take_rate 0.03 0.05 0.08 --stop_loss_rate 0.02 0.03 --K 3 5 7
+    python -m backtesting.sweep --max_positions 3 5 10 --V 250000 500000 --save_artifacts
+    python -m backtesting.sweep --initial_capital 100000 1000000 10000000   # capacity curve
+    python -m backtesting.sweep --N 10 20 40 60 --K 3 5
+
+Data is loaded, scored and pivoted into a PricePanel once; every grid point
+then runs the dense engine against that shared panel, reusing one ExitPlan per
+(win_take_rate, stop_loss_rate, K); points that differ only in
+initial_capital / max_positions run as variants of one engine pass.
+--workers spreads grid points over a process pool that shares the panel. The weights w1, w2 are fixed
+for the whole sweep; several N values are evaluated one panel at a time, scored together by
+one multi-window signal pass (signals.compute_signal_windows) with --signal_kernel cumsum.
+
+Outputs results/sweep_{run_id}/sweep.csv (one row per grid point). With
+--save_artifacts each point also gets the usual per-run files in
+results/sweep_{run_id}/{index:03d}/.
+"""
+
+import argparse
+import contextlib
+import dataclasses
+import itertools
+import math
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from backtesting.config import BacktestConfig
+from backtesting.data_loader import load_price_data, prune_universe
+from backtesting.engine import run_backtest_variants
+from backtesting.exits import entry_mask, resolve_exits
+from backtesting.panel import PricePanel, attach_panel, build_panel, release_panel, share_panel
+from backtesting.price_cache import cached_price_data
+from backtesting.run import RESULTS_DIR, make_run_id, save_outputs
+from backtesting.signal_cache import cached_os_scores
+from backtesting.signals import apply_signal_window, compute_os_scores, compute_signal_windows
+from results.report import compute_metrics
+
+SWEEP_PARAMS = ("N", "win_take_rate", "stop_loss_rate", "K", "max_positions", "V", "min_price", "initial_capital")
+EXIT_PARAMS = ("win_take_rate", "stop_loss_rate", "K")
+# Parameters run_backtest_variants advances together in one engine pass
+VARIANT_PARAMS = ("initial_capital", "max_positions")
+
+
+def expand_grid(base: BacktestConfig, grid: dict) -> list[BacktestConfig]:
+    """
+    Cartesian product of grid values applied on top of base (dense engine).
+
+    Values are cast to the field's Python type: a NumPy scalar (e.g. from
+    np.linspace) would otherwise change float32 promotion in the engine and
+    give results that differ from a CLI run of the same point.
+    """
+    unknown = set(grid) - set(SWEEP_PARAMS)
+    if unknown:
+        raise ValueError(f"Cannot sweep {sorted(unknown)}; sweepable: {SWEEP_PARAMS}")
+    keys = list(grid)
+    values = [[type(getattr(base, k))(v) for v in grid[k]] for k in keys]
+    return [
+        dataclasses.replace(base, engine="dense", **dict(zip(keys, combo)))
+        for combo in itertools.product(*values)
+    ]
+
+
+def widest_universe(base: BacktestConfig, configs: list[BacktestConfig]) -> BacktestConfig:
+    """base with the lowest V and min_price of configs: its entry set covers every config's."""
+    return dataclasses.replace(
+        base,
+        V=min(cfg.V for cfg in configs),
+        min_price=min(cfg.min_price for cfg in configs),
+    )
+
+
+def prepare_panel(config: BacktestConfig, df: "pd.DataFrame | None" = None) -> PricePanel:
+    """
+    Load, score and pivot the data for config once (pruned with config's V / min_price if enabled).
+    df, if given, is the already loaded frame of config and is not modified.
+    """
+    if df is None:
+        df = cached_price_data(config) if config.price_cache else load_price_data(config)
+    if config.prune_universe:
+        df = prune_universe(df, config)
+    df = cached_os_scores(df, config) if config.signal_cache else compute_os_scores(df, config)
+    return build_panel(df)
+
+
+def prepare_panels(config: BacktestConfig, windows: list[int]):
+    """
+    Yield (N, panel) for every window length in `windows`.
+
+    With the cumsum kernel, several windows share one load and one
+    compute_signal_windows pass, which gives the same scores as that kernel
+    per N. Otherwise (pandas kernel, or signal_cache, whose entries are per
+    N) each window is prepare_panel(config with that N). Each panel is built
+    only when the previous one has been consumed.
+    """
+    if len(windows) == 1:
+        yield windows[0], prepare_panel(dataclasses.replace(config, N=windows[0]))
+        return
+    df = cached_price_data(config) if config.price_cache else load_price_data(config)
+    if config.signal_kernel != "cumsum" or config.signal_cache:
+        for N in windows:
+            yield N, prepare_panel(dataclasses.replace(config, N=N), df)
+        return
+    if config.prune_universe:
+        df = prune_universe(df, dataclasses.replace(config, N=min(windows)))
+    base, blocks = compute_signal_windows(df, windows)
+    del df
+    for N in windows:
+        scored = apply_signal_window(base, blocks.pop(N), dataclasses.replace(config, N=N))
+        yield N, build_panel(scored)
+
+
+def evaluate_configs(
+    panel: PricePanel,
+    configs: list[BacktestConfig],
+    save_dir=None,
+    workers: int = 1,
+    numbers: "list[int] | None" = None,
+) -> pd.DataFrame:
+    """
+    Run every config against the shared panel; one metrics row per config, in input order.
+
+    Configs are visited grouped by (TP, SL, K) so only one ExitPlan is alive at
+    a time; each plan covers the widest entry set of the group (lowest V and
+    min_price), which is a superset of what every config in it can buy.
+    If save_dir is set, per-run artifacts go to save_dir/{number:03d}/, where
+    numbers[k] is the number of configs[k] (default: its index).
+
+    With workers > 1 the groups (split further so every worker stays busy) run
+    in a process pool. Workers map the panel's arrays from shared memory
+    (see _worker_pool); nothing is re-read from disk.
+    """
+    tasks = _split_tasks(configs, n_tasks=workers * 4 if workers > 1 else 1)
+    rows: list[dict] = [{} for _ in configs]
+    if numbers is None:
+        numbers = range(len(configs))
+
+    def _items(task: list[int]) -> list[tuple]:
+        return [
+            (k, configs[k], save_dir / f"{numbers[k]:03d}" if save_dir is not None else None)
+            for k in task
+        ]
+
+    if workers <= 1:
+        for task in tasks:
+            for k, row in _evaluate_task(panel, _items(task)):
+                rows[k] = row
+        return pd.DataFrame(rows)
+
+    with _worker_pool(panel, workers) as pool:
+        futures = [pool.submit(_evaluate_task_in_worker, _items(task)) for task in tasks]
+        for future in as_completed(futures):
+            for k, row in future.result():
+                rows[k] = row
+    return pd.DataFrame(rows)
+
+
+def run_sweep(
+    base_config: BacktestConfig,
+    grid: dict,
+    save_artifacts: bool = False,
+    workers: int = 1,
+) -> pd.DataFrame:
+    """
+    Full sweep: load + score once -> evaluate every grid point -> save sweep.csv.
+
+    workers — number of processes evaluating grid points (1 = in-process).
+    Returns one row per grid point: the swept parameters plus
+    n_trades, total_return_pct, sharpe_ratio, max_drawdown_pct.
+    """
+    if base_config.run_id:
+        sweep_id = f"sweep_{base_config.run_id}"
+    else:
+        sweep_id = make_run_id(prefix="sweep_")
+    sweep_dir = RESULTS_DIR / sweep_id
+    sweep_dir.mkdir(parents=True, exist_ok=True)
+
+    configs = expand_grid(base_config, grid)
+    windows = list(dict.fromkeys(cfg.N for cfg in configs))
+    for k, cfg in enumerate(configs):
+        cfg.run_id = f"{sweep_id}_{k:03d}"
+    if len(windows) > 1 and base_config.signal_kernel != "cumsum":
+        print(f"[{sweep_id}] Scoring each N separately with the {base_config.signal_kernel} kernel; "
+              f"--signal_kernel cumsum scores all windows in one pass")
+
+    print(f"[{sweep_id}] Loading and scoring {base_config.data_path} (N={windows})...")
+    parts = []
+    for N, panel in prepare_panels(widest_universe(base_config, configs), windows):
+        numbers = [k for k, cfg in enumerate(configs) if cfg.N == N]
+        print(f"[{sweep_id}] Evaluating {len(numbers)} configs with N={N} on "
+              f"{panel.n_tickers} tickers x {panel.n_dates} days ({workers} worker(s))...")
+        part = evaluate_configs(
+            panel, [configs[k] for k in numbers], save_dir=sweep_dir if save_artifacts else None,
+            workers=workers, numbers=numbers,
+        )
+        parts.append(part.set_axis(numbers))
+    table = pd.concat(parts).sort_index().reset_index(drop=True)
+    table.to_csv(sweep_dir / "sweep.csv", index=False)
+    print(f"[{sweep_id}] Results: {sweep_dir / 'sweep.csv'}")
+    return table
+
+
+def _exit_key(config: BacktestConfig) -> tuple:
+    return tuple(getattr(config, p) for p in EXIT_PARAMS)
+
+
+def _split_tasks(configs: list[BacktestConfig], n_tasks: int) -> list[list[int]]:
+    """Config indices grouped by exit key, each group cut into chunks of ~len/n_tasks."""
+    chunk = max(1, math.ceil(len(configs) / n_tasks))
+    order = sorted(range(len(configs)), key=lambda k: _exit_key(configs[k]))
+    tasks = []
+    for _, group in itertools.groupby(order, key=lambda k: _exit_key(configs[k])):
+        group = list(group)
+        tasks.extend(group[i:i + chunk] for i in range(0, len(group), chunk))
+    return tasks
+
+
+def _evaluate_task(panel: PricePanel, items: list[tuple]) -> list[tuple[int, dict]]:
+    """Evaluate (index, config, artifact dir or None) items that share one exit key."""
+    configs = [cfg for _, cfg, _ in items]
+    widest = widest_universe(configs[0], configs)
+    exits = resolve_exits(panel, widest, mask=entry_mask(panel, widest))
+
+    # Configs equal up to capital / position count share one engine pass
+    def _pass_key(item):
+        return tuple(getattr(item[1], p) for p in SWEEP_PARAMS if p not in VARIANT_PARAMS)
+
+    results = []
+    for _, group in itertools.groupby(sorted(items, key=_pass_key), key=_pass_key):
+        group = list(group)
+        variants = [(cfg.initial_capital, cfg.max_positions) for _, cfg, _ in group]
+        outputs = run_backtest_variants(panel, group[0][1], variants, exits=exits)
+        for (k, cfg, out_dir), (trades_df, portfolio_df) in zip(group, outputs):
+            metrics = compute_metrics(portfolio_df, trades_df)
+            if out_dir is not None:
+                cfg.output_dir = str(out_dir)
+                save_outputs(cfg, trades_df, portfolio_df, metrics)
+            results.append((k, {**{p: getattr(cfg, p) for p in SWEEP_PARAMS}, **metrics}))
+    return results
+
+
+# Panel of a pool worker, attached to the parent's shared memory by the initializer
+_WORKER_PANEL: "PricePanel | None" = None
+_WORKER_BLOCKS: list = []
+
+
+def _attach_worker_panel(spec: dict) -> None:
+    global _WORKER_PANEL, _WORKER_BLOCKS
+    _WORKER_PANEL, _WORKER_BLOCKS = attach_panel(spec)
+
+
+def _evaluate_task_in_worker(items):
+    return _evaluate_task(_WORKER_PANEL, items)
+
+
+@contextlib.contextmanager
+def _worker_pool(panel: PricePanel, workers: int):
+    """
+    A process pool whose workers see panel through shared memory.
+
+    Workers start from a fork server (spawn where there is none), not by
+    forking this process: by now Arrow's reader threads are running, and a
+    fork of a multi-threaded process can deadlock. The numeric panel arrays
+    are copied once into shared memory and mapped by every worker; only the
+    object columns are pickled to each.
+    """
+    method = "forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn"
+    blocks, spec = share_panel(panel)
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=mp.get_context(method),
+            initializer=_attach_worker_panel, initargs=(spec,),
+        ) as pool:
+            yield pool
+    finally:
+        release_panel(blocks)
+
+
+def add_grid_arguments(parser: argparse.ArgumentParser) -> None:
+    """Signal/data options plus one multi-valued option per SWEEP_PARAMS entry."""
+    parser.add_argument("--N", type=int, nargs="+", default=[20], help="Lookback window(s) (default: 20)")
+    parser.add_argument("--w1", type=float, default=-1.0, help="Return weight (default: -1.0)")
+    parser.add_argument("--w2", type=float, default=1.0, help="Volume weight (default: 1.0)")
+    parser.add_argument("--win_take_rate", type=float, nargs="+", default=[0.05])
+    parser.add_argument("--stop_loss_rate", type=float, nargs="+", default=[0.03])
+    parser.add_argument("--K", type=int, nargs="+", default=[5])
+    parser.add_argument("--max_positions", type=int, nargs="+", default=[3])
+    parser.add_argument("--V", type=int, nargs="+", default=[500_000])
+    parser.add_argument("--min_price", type=float, nargs="+", default=[1.00])
+    parser.add_argument("--initial_capital", type=float, nargs="+", default=[500_000.0])
+    parser.add_argument("--start_date", type=str, default=None)
+    parser.add_argument("--end_date", type=str, default=None)
+    parser.add_argument("--data_path", type=str, default="data/v3/prices.parquet")
+    parser.add_argument("--price_cache", action="store_true",
+                        help="Memory-map the loaded frame cached next to --data_path for the same data and dates")
+    parser.add_argument("--signal_cache", action="store_true",
+                        help="Reuse r / D_r / D_v cached next to --data_path for the same data, dates and N")
+    parser.add_argument("--signal_kernel", choices=["pandas", "cumsum"], default="pandas",
+                        help="Z-score implementation (default: pandas); 'cumsum' scores several --N in one pass")
+    parser.add_argument("--signal_workers", type=int, default=1,
+                        help="Score ticker blocks in parallel with this many workers (default: 1)")
+    parser.add_argument("--prune_universe", action="store_true",
+                        help="Drop tickers no grid point can enter before scoring (same results, less work)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processes evaluating grid points in parallel (default: 1)")
+
+
+def parse_grid_arguments(args: argparse.Namespace) -> tuple[BacktestConfig, dict]:
+    """(base config, grid) from arguments added by add_grid_arguments."""
+    base = BacktestConfig(
+        N=args.N[0],
+        w1=args.w1,
+        w2=args.w2,
+        start_date=args.start_date,
+        end_date=args.end_date,
+        data_path=args.data_path,
+        price_cache=args.price_cache,
+        signal_cache=args.signal_cache,
+        signal_kernel=args.signal_kernel,
+        prune_universe=args.prune_universe,
+        signal_workers=args.signal_workers,
+    )
+    return base, {p: getattr(args, p) for p in SWEEP_PARAMS}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Sweep oversell backtest hyperparameters")
+    add_grid_arguments(parser)
+    parser.add_argument("--save_artifacts", action="store_true",
+                        help="Also write trades/portfolio/config/report for every grid point")
+    args = parser.parse_args()
+
+    base, grid = parse_grid_arguments(args)
+    table = run_sweep(base, grid, save_artifacts=args.save_artifacts, workers=args.workers)
+    print(table.sort_values("sharpe_ratio", ascending=False).head(10).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
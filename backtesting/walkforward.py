@@ -0,0 +1,241 @@
+"""
+Walk-forward optimization: pick parameters in-sample, trade them out-of-sample.
+
+Usage:
+    python -m backtesting.walkforward --train_days 504 --test_days 126 \
+        --win_take_rate 0.03 0.05 0.08 --stop_loss_rate 0.02 0.03 --K 3 5 7
+
+The data between start_date and end_date is loaded and scored once. Each fold
+evaluates the grid on a rolling train window of `train_days` trading days,
+picks the config with the best `metric`, runs it on the following `test_days`
+days, then rolls forward by `test_days`. Windows are slices of one PricePanel,
+so signals keep their warm-up across fold boundaries and nothing is reloaded.
+
+Outputs to results/walkforward_{run_id}/:
+    folds.csv      one row per fold: windows, chosen params, in-sample and OOS metrics
+    trades.csv     out-of-sample trades of every fold (with a fold column)
+    portfolio.csv  stitched out-of-sample equity curve
+    config.json, report.html
+"""
+
+import argparse
+import dataclasses
+import json
+
+import pandas as pd
+
+from backtesting.config import BacktestConfig
+from backtesting.engine import run_backtest_dense
+from backtesting.panel import PricePanel
+from backtesting.run import RESULTS_DIR, make_run_id
+from backtesting.sweep import (
+    SWEEP_PARAMS,
+    add_grid_arguments,
+    evaluate_configs,
+    expand_grid,
+    parse_grid_arguments,
+    prepare_panel,
+    widest_universe,
+)
+from results.report import compute_metrics, save_report
+
+
+def make_folds(n_dates: int, train_days: int, test_days: int) -> list[tuple[int, int, int]]:
+    """(train_start, test_start, test_stop) date indices; the last test window may be short."""
+    folds = []
+    start = 0
+    while start + train_days < n_dates:
+        test_start = start + train_days
+        folds.append((start, test_start, min(test_start + test_days, n_dates)))
+        start += test_days
+    return folds
+
+
+def walk_forward(
+    panel: PricePanel,
+    configs: list[BacktestConfig],
+    train_days: int,
+    test_days: int,
+    metric: str = "sharpe_ratio",
+    workers: int = 1,
+) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Run the walk-forward over a prepared panel.
+
+    Ties on `metric` go to the config listed first.
+    Returns: (folds_df, trades_df, portfolio_df) — the latter two out-of-sample only.
+    """
+    if len({cfg.initial_capital for cfg in configs}) > 1:
+        raise ValueError("Walk-forward folds are stitched from one initial_capital; do not sweep it")
+    if len({cfg.N for cfg in configs}) > 1:
+        raise ValueError("Walk-forward runs on one scored panel; do not sweep N")
+    folds = make_folds(panel.n_dates, train_days, test_days)
+    if not folds:
+        raise ValueError(
+            f"{panel.n_dates} trading days is too short for train_days={train_days}"
+        )
+
+    fold_rows: list[dict] = []
+    fold_trades: list[pd.DataFrame] = []
+    fold_portfolios: list[pd.DataFrame] = []
+
+    for fold, (train_start, test_start, test_stop) in enumerate(folds):
+        in_sample = evaluate_configs(panel.slice(train_start, test_start), configs, workers=workers)
+        best = int(in_sample[metric].to_numpy().argmax())
+        best_config = configs[best]
+
+        trades_df, portfolio_df = run_test_window(panel, best_config, test_start, test_stop)
+        oos_metrics = compute_metrics(portfolio_df, trades_df)
+        print(
+            f"Fold {fold}: train {_date(panel, train_start)}..{_date(panel, test_start - 1)} "
+            f"{metric}={in_sample[metric].iloc[best]} -> test {_date(panel, test_start)}.."
+            f"{_date(panel, test_stop - 1)} return={oos_metrics['total_return_pct']:.2f}%"
+        )
+
+        fold_rows.append({
+            "fold": fold,
+            "train_start": _date(panel, train_start),
+            "train_end": _date(panel, test_start - 1),
+            "test_start": _date(panel, test_start),
+            "test_end": _date(panel, test_stop - 1),
+            **{p: getattr(best_config, p) for p in SWEEP_PARAMS},
+            f"is_{metric}": in_sample[metric].iloc[best],
+            **{f"oos_{k}": v for k, v in oos_metrics.items()},
+        })
+        if not trades_df.empty:
+            fold_trades.append(trades_df.assign(fold=fold))
+        fold_portfolios.append(portfolio_df)
+
+    trades = pd.concat(fold_trades, ignore_index=True) if fold_trades else pd.DataFrame()
+    portfolio = stitch_equity(fold_portfolios, configs[0].initial_capital)
+    return pd.DataFrame(fold_rows), trades, portfolio
+
+
+def run_test_window(
+    panel: PricePanel, config: BacktestConfig, start: int, stop: int,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    run_backtest_dense on dates [start, stop) of panel.
+
+    Entries on a day are picked from the previous day's row, which a panel
+    sliced at start does not have; the slice starts one day early instead and
+    that day's flat-cash snapshot (nothing can be bought or held yet) is dropped.
+    """
+    lead = 1 if start > 0 else 0
+    trades_df, portfolio_df = run_backtest_dense(panel.slice(start - lead, stop), config)
+    return trades_df, portfolio_df.iloc[lead:].reset_index(drop=True)
+
+
+def stitch_equity(portfolios: list[pd.DataFrame], initial_capital: float) -> pd.DataFrame:
+    """
+    Chain per-fold portfolios (each starting from initial_capital) into one curve.
+
+    Each fold is rescaled so it starts from the previous fold's ending value;
+    daily returns are unchanged and cumulative_return is recomputed.
+    """
+    scaled = []
+    equity = initial_capital
+    for port_df in portfolios:
+        if port_df.empty:
+            continue
+        factor = equity / initial_capital
+        port_df = port_df.copy()
+        for col in ("cash", "position_value", "total_value"):
+            port_df[col] = (port_df[col] * factor).round(2)
+        scaled.append(port_df)
+        equity = float(port_df["total_value"].iloc[-1])
+
+    if not scaled:
+        return pd.DataFrame()
+    stitched = pd.concat(scaled, ignore_index=True)
+    stitched["cumulative_return"] = (1 + stitched["daily_return"]).cumprod() - 1
+    return stitched
+
+
+def run_walk_forward(
+    base_config: BacktestConfig,
+    grid: dict,
+    train_days: int,
+    test_days: int,
+    metric: str = "sharpe_ratio",
+    workers: int = 1,
+) -> dict:
+    """
+    Full pipeline: load + score once -> walk-forward -> save outputs.
+
+    Returns config dict with stitched out-of-sample metrics (same as config.json contents).
+    """
+    if base_config.run_id:
+        run_id = f"walkforward_{base_config.run_id}"
+    else:
+        run_id = make_run_id(prefix="walkforward_")
+    run_dir = RESULTS_DIR / run_id
+    run_dir.mkdir(parents=True, exist_ok=True)
+
+    configs = expand_grid(base_config, grid)
+    print(f"[{run_id}] Loading and scoring {base_config.data_path}...")
+    panel = prepare_panel(widest_universe(dataclasses.replace(base_config, N=configs[0].N), configs))
+
+    print(f"[{run_id}] {len(configs)} configs, train={train_days} / test={test_days} days "
+          f"over {panel.n_dates} trading days...")
+    folds_df, trades_df, portfolio_df = walk_forward(
+        panel, configs, train_days, test_days, metric=metric, workers=workers,
+    )
+    metrics = compute_metrics(portfolio_df, trades_df)
+    print(
+        f"[{run_id}] Out-of-sample: "
+        f"Trades: {metrics['n_trades']}, "
+        f"Return: {metrics['total_return_pct']:.2f}%, "
+        f"Sharpe: {metrics['sharpe_ratio']:.2f}, "
+        f"MaxDD: {metrics['max_drawdown_pct']:.2f}%"
+    )
+
+    folds_df.to_csv(run_dir / "folds.csv", index=False)
+    trades_df.to_csv(run_dir / "trades.csv", index=False)
+    portfolio_df.to_csv(run_dir / "portfolio.csv", index=False)
+
+    config_dict = dataclasses.asdict(base_config)
+    config_dict.update(
+        run_id=run_id,
+        output_dir=str(run_dir),
+        grid=grid,
+        train_days=train_days,
+        test_days=test_days,
+        metric=metric,
+        metrics=metrics,
+    )
+    with open(run_dir / "config.json", "w") as f:
+        json.dump(config_dict, f, indent=2)
+
+    save_report(
+        run_id=run_id,
+        config_dict=config_dict,
+        metrics=metrics,
+        trades_df=trades_df,
+        portfolio_df=portfolio_df,
+        output_dir=run_dir,
+    )
+    print(f"[{run_id}] Report: {run_dir / 'report.html'}")
+    return config_dict
+
+
+def _date(panel: PricePanel, t: int) -> str:
+    return pd.Timestamp(panel.dates[t]).strftime("%Y-%m-%d")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Walk-forward optimization of the oversell backtest")
+    add_grid_arguments(parser)
+    parser.add_argument("--train_days", type=int, default=504, help="In-sample window (trading days)")
+    parser.add_argument("--test_days", type=int, default=126, help="Out-of-sample window (trading days)")
+    parser.add_argument("--metric", type=str, default="sharpe_ratio",
+                        choices=["sharpe_ratio", "total_return_pct", "max_drawdown_pct"],
+                        help="In-sample metric to maximize (default: sharpe_ratio)")
+    args = parser.parse_args()
+
+    base, grid = parse_grid_arguments(args)
+    run_walk_forward(base, grid, args.train_days, args.test_days, metric=args.metric, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,8 +4,14 @@ Preprocess Sharadar SEP + TICKERS CSVs into prices.csv for the backtesting engin
 Usage:
     python data/v3/preprocess.py --source fake
     python data/v3/preprocess.py --source raw
+    python data/v3/preprocess.py --source raw --partition year [--since 2025-01-01]
 
-Output: data/v3/prices.csv (14 columns, sorted by ticker+date)
+Output: data/v3/prices.csv (14 columns, sorted by ticker+date), or with
+--partition a hive-partitioned parquet dataset data/v3/prices/
+(year=YYYY/ or year=YYYY/month=M/, each partition sorted by ticker+date).
+load_price_data reads only the partitions that overlap start_date/end_date.
+--since rewrites only the partitions from that date on, leaving the
+history untouched (e.g. to add a new year of data).
 
 Changes from v2:
     - Removes Nano, Micro, and Small market cap tickers (scalemarketcap 1-3)
@@ -107,7 +113,35 @@ def write_output(df: pd.DataFrame) -> Path:
     return out_path
 
 
-def main(source: str) -> None:
+def write_partitioned(df: pd.DataFrame, partition: str, since: "str | None" = None) -> Path:
+    """Write data/v3/prices/ partitioned by year or year/month; only partitions from `since` on if given."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    keys = ["year"] if partition == "year" else ["year", "month"]
+    out = df[OUTPUT_COLUMNS].copy()
+    out["year"] = out["date"].dt.year
+    if partition == "month":
+        out["month"] = out["date"].dt.month
+    if since:
+        # Whole partitions: the one holding `since` is rewritten from its first day
+        first = pd.Timestamp(since).to_period("Y" if partition == "year" else "M").start_time
+        out = out[out["date"] >= first]
+    out = out.sort_values(keys + ["ticker", "date"]).reset_index(drop=True)
+
+    out_path = DATA_V3 / "prices"
+    pq.write_to_dataset(
+        pa.Table.from_pandas(out, preserve_index=False),
+        out_path,
+        partition_cols=keys,
+        # Replace the partitions being written, keep every other one
+        existing_data_behavior="delete_matching",
+        basename_template="part-{i}.parquet",
+    )
+    return out_path
+
+
+def main(source: str, partition: str = "none", since: "str | None" = None) -> None:
     print(f"Loading {source} data...")
     prices, tickers = load_data(source)
     print(f"  Loaded {len(prices)} price rows, {len(tickers)} ticker rows")
@@ -126,7 +160,10 @@ def main(source: str) -> None:
     n_halts = df["is_halt"].sum()
     print(f"  Forward-filled {n_halts} halt days")
 
-    out_path = write_output(df)
+    if partition == "none":
+        out_path = write_output(df)
+    else:
+        out_path = write_partitioned(df, partition, since)
     print(f"  Written: {out_path}")
     print(f"  Shape: {df.shape}, tickers: {df['ticker'].nunique()}")
     print("Done.")
@@ -136,5 +173,11 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Preprocess Sharadar data to prices.csv")
     parser.add_argument("--source", choices=["fake", "raw"], default="fake",
                         help="'fake' for synthetic data, 'raw' for real Sharadar CSVs")
+    parser.add_argument("--partition", choices=["none", "year", "month"], default="none",
+                        help="Write a parquet dataset partitioned by year or year/month instead of prices.csv")
+    parser.add_argument("--since", type=str, default=None,
+                        help="With --partition: rewrite only the partitions from this date on")
     args = parser.parse_args()
-    main(args.source)
+    if args.since and args.partition == "none":
+        parser.error("--since requires --partition")
+    main(args.source, args.partition, args.since)
@@ -94,7 +94,10 @@ _repo_root = Path(__file__).resolve().parents[1]
 _IS_PROD = str(_repo_root).startswith("/mount/src")
 
 _drive_path = _get_drive_data()
-_detected = sorted(str(p.relative_to(_repo_root)) for p in _repo_root.glob("data/*/prices.csv"))
+_detected = sorted(
+    str(p.relative_to(_repo_root))
+    for p in [*_repo_root.glob("data/*/prices.csv"), *_repo_root.glob("data/*/prices/")]
+)
 _options = ([_drive_path] if _drive_path else []) + _detected + ["Custom…"]
 
 
@@ -38,6 +38,7 @@ class RunResult:
     max_drawdown_pct: Optional[float] = None
     n_trades: Optional[int] = None
     duration_seconds: Optional[float] = None
+    timings: Optional[dict] = None              # Per-stage / per-phase wall time and memory (config.json "timings")
 
 
 def run_backtest(params: BacktestParams, progress_callback=None, status_callback=None) -> RunResult:
@@ -53,6 +54,11 @@ def run_backtest(params: BacktestParams, progress_callback=None, status_callback
         start_date=params.start_date,
         end_date=params.end_date,
         data_path=params.data_path,
+        frame_cache=True,           # exit-only changes reuse the scored frame held by this process
+        frame_cache_mb=256,         # stays well inside Streamlit Cloud's 1 GB next to a fresh load
+        price_cache=True,           # reloads memory-map the prepared frame instead of decoding the file
+        signal_cache=True,          # re-runs with new weights / exits skip the rolling windows
+        prune_universe=True,        # never-enterable tickers are not scored (same results)
     )
 
     t0 = time.time()
@@ -83,4 +89,5 @@ def run_backtest(params: BacktestParams, progress_callback=None, status_callback
         max_drawdown_pct=metrics.get("max_drawdown_pct"),
         n_trades=metrics.get("n_trades"),
         duration_seconds=duration,
+        timings=config_dict.get("timings"),
     )
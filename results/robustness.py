@@ -0,0 +1,228 @@
+"""
+Monte Carlo robustness of a finished run: resample its trade sequence.
+
+Usage:
+    python -m results.robustness results/{run_id}
+    python -m results.robustness results/{run_id} --n_resamples 20000 --method block_bootstrap
+
+Public API:
+    resample_trades(trades_df, portfolio_df, initial_capital, method, ...) -> DataFrame
+    summarize(dist_df, observed) -> DataFrame
+    run_robustness(run_dir, ...) -> DataFrame
+
+A run is one path through its trades. Each trade becomes a return on the
+equity it was entered with (pnl / total_value of the day before entry_date,
+see trade_returns); each resample compounds those returns (in exit order for
+the observed path) in a new order from initial_capital, and measures total
+return, max drawdown and a trade-level Sharpe. A trade cannot lose more than
+its equity, so a path that reaches zero stays there (ruin): total return and
+max drawdown never go below -100%.
+Methods:
+    bootstrap        n trades drawn with replacement
+    block_bootstrap  circular blocks of block_size consecutive trades, drawn
+                     with replacement (keeps short-range streaks together)
+    permutation      the same trades in a random order (total return is
+                     unchanged; only the path differs)
+
+All resamples run as (resamples x trades) NumPy matrices, in chunks to bound
+memory. The trade-level Sharpe is mean/std of the returns of the trades
+taken before ruin, annualized by trades per year (n trades over
+len(portfolio_df) / 252 years).
+
+Outputs robustness.csv (percentiles per method and metric) in the run folder.
+"""
+
+import argparse
+import json
+import math
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+METHODS = ("bootstrap", "block_bootstrap", "permutation")
+METRICS = ("total_return_pct", "max_drawdown_pct", "sharpe_ratio")
+PERCENTILES = (5, 25, 50, 75, 95)
+
+# Matrix cells (resamples x trades) processed per chunk
+_CHUNK_CELLS = 4_000_000
+
+
+def resample_trades(
+    trades_df: pd.DataFrame,
+    portfolio_df: pd.DataFrame,
+    initial_capital: float,
+    method: str = "bootstrap",
+    n_resamples: int = 10_000,
+    block_size: "int | None" = None,
+    seed: "int | None" = None,
+) -> pd.DataFrame:
+    """
+    Distribution of run metrics over resampled trade sequences.
+
+    block_size defaults to round(n_trades ** (1/3)) (block_bootstrap only).
+    Returns one row per resample with columns total_return_pct,
+    max_drawdown_pct and sharpe_ratio.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method {method!r}; expected one of {METHODS}")
+    returns = trade_returns(trades_df, portfolio_df, initial_capital) if not trades_df.empty else np.empty(0)
+    n = len(returns)
+    if n == 0:
+        return pd.DataFrame(0.0, index=range(n_resamples), columns=list(METRICS))
+    if block_size is None:
+        block_size = max(1, round(n ** (1 / 3)))
+    trades_per_year = _trades_per_year(n, portfolio_df)
+
+    rng = np.random.default_rng(seed)
+    chunk = max(1, _CHUNK_CELLS // n)
+    parts = []
+    for start in range(0, n_resamples, chunk):
+        b = min(chunk, n_resamples - start)
+        paths = returns[_draw_indices(rng, method, b, n, block_size)]
+        parts.append(_path_metrics(paths, trades_per_year))
+    return pd.DataFrame(np.concatenate(parts), columns=list(METRICS))
+
+
+def observed_metrics(trades_df: pd.DataFrame, portfolio_df: pd.DataFrame, initial_capital: float) -> dict:
+    """The resample metrics of the actual trade order, for comparison."""
+    if trades_df.empty:
+        return dict.fromkeys(METRICS, 0.0)
+    returns = trade_returns(trades_df, portfolio_df, initial_capital)
+    values = _path_metrics(returns[None, :], _trades_per_year(len(returns), portfolio_df))[0]
+    return dict(zip(METRICS, values.tolist()))
+
+
+def trade_returns(trades_df: pd.DataFrame, portfolio_df: pd.DataFrame, initial_capital: float) -> np.ndarray:
+    """
+    pnl / equity at entry of every trade, in trades_df order, floored at -1.
+
+    Equity at entry is the total_value of the last portfolio date before
+    entry_date (initial_capital for trades entered on the first day, or
+    without a portfolio).
+    """
+    pnl = trades_df["pnl"].to_numpy(dtype=np.float64)
+    equity = np.full(len(pnl), float(initial_capital))
+    if not portfolio_df.empty:
+        dates = pd.to_datetime(portfolio_df["date"]).to_numpy()
+        entry = pd.to_datetime(trades_df["entry_date"]).to_numpy()
+        prev = np.searchsorted(dates, entry, side="left") - 1
+        known = prev >= 0
+        equity[known] = portfolio_df["total_value"].to_numpy(dtype=np.float64)[prev[known]]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = np.where(equity > 0, pnl / equity, -1.0)
+    return np.maximum(returns, -1.0)
+
+
+def summarize(dist_df: pd.DataFrame, observed: dict) -> pd.DataFrame:
+    """
+    One row per metric: observed value, mean, percentiles and the share of
+    resamples below the observed value.
+    """
+    rows = []
+    for metric in METRICS:
+        values = dist_df[metric].to_numpy()
+        row = {"metric": metric, "observed": observed[metric], "mean": values.mean()}
+        for q, v in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+            row[f"p{q}"] = v
+        below = (values < observed[metric]) & ~np.isclose(values, observed[metric])
+        row["pct_below_observed"] = below.mean() * 100
+        rows.append(row)
+    return pd.DataFrame(rows).round(4)
+
+
+def run_robustness(
+    run_dir,
+    n_resamples: int = 10_000,
+    methods=METHODS,
+    block_size: "int | None" = None,
+    seed: "int | None" = None,
+) -> pd.DataFrame:
+    """
+    Resample a saved run (trades.csv, portfolio.csv, config.json in run_dir)
+    with every method and write robustness.csv there. Returns the table.
+    """
+    run_dir = Path(run_dir)
+    trades_df = _read_csv(run_dir / "trades.csv")
+    portfolio_df = _read_csv(run_dir / "portfolio.csv")
+    with open(run_dir / "config.json") as f:
+        initial_capital = json.load(f).get("initial_capital", 500_000)
+
+    observed = observed_metrics(trades_df, portfolio_df, initial_capital)
+    tables = []
+    for method in methods:
+        dist = resample_trades(
+            trades_df, portfolio_df, initial_capital, method=method,
+            n_resamples=n_resamples, block_size=block_size, seed=seed,
+        )
+        tables.append(summarize(dist, observed).assign(method=method))
+    table = pd.concat(tables, ignore_index=True)
+    table = table[["method"] + [c for c in table.columns if c != "method"]]
+    table.to_csv(run_dir / "robustness.csv", index=False)
+    return table
+
+
+def _draw_indices(rng: np.random.Generator, method: str, b: int, n: int, block_size: int) -> np.ndarray:
+    """(b, n) trade indices of b resamples."""
+    if method == "bootstrap":
+        return rng.integers(0, n, size=(b, n))
+    if method == "block_bootstrap":
+        n_blocks = math.ceil(n / block_size)
+        starts = rng.integers(0, n, size=(b, n_blocks, 1))
+        idx = (starts + np.arange(block_size)) % n
+        return idx.reshape(b, n_blocks * block_size)[:, :n]
+    idx = np.tile(np.arange(n), (b, 1))
+    return rng.permuted(idx, axis=1, out=idx)
+
+
+def _path_metrics(paths: np.ndarray, trades_per_year: float) -> np.ndarray:
+    """(b, 3) total return %, max drawdown % and Sharpe of b compounded trade-return paths (b, n)."""
+    growth = np.cumprod(1 + paths, axis=1)  # equity / initial_capital; 0 from ruin on
+    total_return = (growth[:, -1] - 1) * 100
+    peak = np.maximum(np.maximum.accumulate(growth, axis=1), 1.0)
+    max_drawdown = np.minimum(((growth - peak) / peak).min(axis=1), 0.0) * 100
+
+    # Trades after ruin are never taken
+    taken = np.ones(paths.shape, dtype=bool)
+    taken[:, 1:] = growth[:, :-1] > 0
+    n_taken = taken.sum(axis=1)
+    mean = np.where(taken, paths, 0.0).sum(axis=1) / n_taken
+    sq = np.where(taken, (paths - mean[:, None]) ** 2, 0.0).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        std = np.where(n_taken > 1, np.sqrt(sq / (n_taken - 1)), 0.0)
+        sharpe = np.where(std > 0, mean / std * math.sqrt(trades_per_year), 0.0)
+    return np.column_stack([total_return, max_drawdown, sharpe])
+
+
+def _trades_per_year(n_trades: int, portfolio_df: pd.DataFrame) -> float:
+    years = len(portfolio_df) / 252 if not portfolio_df.empty else 0
+    return n_trades / years if years > 0 else float(n_trades)
+
+
+def _read_csv(path: Path) -> pd.DataFrame:
+    try:
+        return pd.read_csv(path)
+    except pd.errors.EmptyDataError:  # a run without trades writes an empty trades.csv
+        return pd.DataFrame()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bootstrap / permutation robustness of a backtest run")
+    parser.add_argument("run_dir", type=str, help="Run folder, e.g. results/20240101_120000")
+    parser.add_argument("--n_resamples", type=int, default=10_000, help="Resamples per method (default: 10000)")
+    parser.add_argument("--method", choices=METHODS, nargs="+", default=list(METHODS))
+    parser.add_argument("--block_size", type=int, default=None,
+                        help="Trades per block for block_bootstrap (default: n_trades ** (1/3))")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    table = run_robustness(
+        args.run_dir, n_resamples=args.n_resamples, methods=args.method,
+        block_size=args.block_size, seed=args.seed,
+    )
+    print(table.to_string(index=False))
+    print(f"Saved: {Path(args.run_dir) / 'robustness.csv'}")
+
+
+if __name__ == "__main__":
+    main()
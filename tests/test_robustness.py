@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from results.robustness import METHODS, observed_metrics, resample_trades, trade_returns
+
+CAPITAL = 500_000.0
+
+
+def _run(pnl: list, capital: float = CAPITAL) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """One trade per day, entered and exited on that day; portfolio follows the pnl."""
+    dates = pd.date_range("2024-01-01", periods=len(pnl) + 1, freq="D")
+    total = capital + np.concatenate([[0.0], np.cumsum(pnl)])
+    trades = pd.DataFrame({
+        "entry_date": dates[1:].strftime("%Y-%m-%d"),
+        "exit_date": dates[1:].strftime("%Y-%m-%d"),
+        "pnl": pnl,
+    })
+    portfolio = pd.DataFrame({"date": dates.strftime("%Y-%m-%d"), "total_value": total})
+    return trades, portfolio
+
+
+@pytest.mark.parametrize("method", METHODS)
+def test_heavy_losses_never_below_minus_100(method):
+    # Mostly large dollar losses: summed on top of capital they exceed it many times over
+    rng = np.random.default_rng(0)
+    pnl = list(np.where(rng.random(400) < 0.8, -40_000.0, 30_000.0))
+    trades, portfolio = _run([0.0] * len(pnl), CAPITAL)
+    trades["pnl"] = pnl  # the losses, against a flat equity of CAPITAL at every entry
+
+    dist = resample_trades(trades, portfolio, CAPITAL, method=method, n_resamples=2_000, seed=1)
+    assert dist["total_return_pct"].min() >= -100
+    assert dist["max_drawdown_pct"].min() >= -100
+    assert np.isfinite(dist["sharpe_ratio"]).all()
+
+
+def test_ruin_ends_the_path():
+    trades, portfolio = _run([-CAPITAL * 2, 50_000.0, 50_000.0])
+    assert trade_returns(trades, portfolio, CAPITAL)[0] == -1.0
+    observed = observed_metrics(trades, portfolio, CAPITAL)
+    assert observed["total_return_pct"] == -100
+    assert observed["max_drawdown_pct"] == -100
+
+
+def test_returns_are_on_equity_at_entry():
+    trades, portfolio = _run([50_000.0, -55_000.0])
+    np.testing.assert_allclose(trade_returns(trades, portfolio, CAPITAL), [0.1, -0.1])
+    observed = observed_metrics(trades, portfolio, CAPITAL)
+    assert observed["total_return_pct"] == pytest.approx(-1.0)
+    assert observed["max_drawdown_pct"] == pytest.approx(-10.0)